@@ -12,14 +12,40 @@ Design principles:
   - Warns once per threshold crossing, not on every call
   - Only blocks agent-spawning tools at the BLOCK level
 
-State is stored in /tmp/fi-watchdog-{session_id}.json.
+State is stored in /tmp/fi-watchdog-{session_id}.state as a fixed-layout
+binary struct (see STATE_FMT), memory-mapped so each hook invocation does
+in-place byte reads/writes instead of JSON parse/serialize cycles.
+
+The dominant cost of the hook is Python interpreter startup (~30-80ms per
+tool call), not the logic itself. To amortize it, the script can run as a
+long-lived daemon: `python3 context-watchdog.py --daemon` listens on a Unix
+domain socket and holds state in memory. Hook invocations first try the
+socket (a ~1ms round-trip) and fall back to inline processing when no
+daemon is running, so the daemon is strictly optional.
 """
 
 import json
+import mmap
 import os
+import socket
+import struct
 import sys
 import time
 
+# orjson parses/serializes small dicts several times faster than stdlib json
+# and dumps to bytes in one shot (one write syscall instead of one per token).
+# Fall back to stdlib json when it isn't installed.
+try:
+    import orjson
+
+    _loads = orjson.loads
+    _dumps = orjson.dumps
+except ImportError:
+    _loads = json.loads
+
+    def _dumps(obj):
+        return json.dumps(obj).encode("utf-8")
+
 
 # ---------------------------------------------------------------------------
 # Thresholds — expressed as transcript GROWTH in KB since last reset.
@@ -42,17 +68,76 @@ BLOCK_GROWTH_KB = 960       # ~85% — block expensive operations
 CLEAR_DETECTION_DROP = 0.40  # 40% drop = /clear detected
 
 # Tools that get BLOCKED when context is critical.
-BLOCKED_TOOLS = {"TaskCreate", "TeamCreate", "SendMessage"}
-
-# How often to emit warnings at each level (every Nth tool call at that level)
-WARN_EVERY_N = 8       # at WARN level, warn every 8 calls
-CRITICAL_EVERY_N = 3   # at CRITICAL level, warn every 3 calls
-BLOCK_EVERY_N = 1      # at BLOCK level, warn on EVERY call
+BLOCKED_TOOLS = frozenset({"TaskCreate", "TeamCreate", "SendMessage"})
+
+# Risk is an integer level: 0=OK, 1=WARN, 2=CRITICAL, 3=BLOCK.
+# Warning message templates indexed by risk level, formatted with
+# (pct, growth_kb). Built once at module load instead of per call.
+MESSAGES = (
+    None,
+    "Context watchdog: ~{0}% capacity (+{1:.0f}KB).",
+    "Context watchdog: ~{0}% capacity (+{1:.0f}KB). "
+    "Finish current step, save state, plan to /clear.",
+    "Context watchdog: ~{0}% capacity (+{1:.0f}KB). Save state and /clear.",
+)
+
+# How often to emit warnings at each level (every Nth tool call at that
+# level), indexed by risk level. OK (index 0) never warns. Power-of-two
+# cadences throttle with a bitmask AND instead of a divmod; the rest
+# (None in the mask table) fall back to modulo.
+EVERY_N = (0, 8, 3, 1)
+EVERY_MASK = tuple(
+    n - 1 if n and not (n & (n - 1)) else None for n in EVERY_N
+)
+
+
+# Binary state layout: baseline_kb, last_seen_kb, last_reset (doubles),
+# tool_calls_since_reset, persisted_tool_calls, warn counts for
+# levels WARN/CRITICAL/BLOCK (uint32s), then last_stat_mtime_ns and
+# last_inode (uint64s).
+# A freshly created (zero-filled) file unpacks to a valid empty state.
+STATE_FMT = "<ddd5IQQ"
+STATE_SIZE = struct.calcsize(STATE_FMT)
+
+# NUL-padded slot after the struct holding the resolved transcript realpath,
+# so symlinked/relative paths are resolved once per session instead of on
+# every stat. Re-resolved when the cached target disappears (rotation).
+PATH_SLOT = 256
+STATE_FILE_SIZE = STATE_SIZE + PATH_SLOT
+
+# On the OK path, only persist state every Nth tool call. The counter is
+# advisory — /clear is detected via transcript-size drop, not counter value —
+# so losing a few in-memory increments on crash is harmless.
+DIRTY_THRESHOLD = 8
+
+# ...but do persist whenever this much transcript growth has accumulated
+# since the last persisted measurement, so /clear detection and risk
+# classification never work from badly stale data.
+KB_CHECKPOINT = 50
+
+# Response shapes are fixed; only the message varies. Serializing just the
+# message string and splicing it into a prebuilt bytes template is ~3x
+# cheaper than serializing the nested dict on every emit.
+_PRE_RESP = (
+    b'{"hookSpecificOutput":{"hookEventName":"PreToolUse",'
+    b'"permissionDecision":"deny","permissionDecisionReason":%s}}'
+)
+_POST_RESP = (
+    b'{"hookSpecificOutput":{"hookEventName":"PostToolUse",'
+    b'"additionalContext":%s}}'
+)
+
+# Unix socket the optional daemon listens on (see module docstring).
+SOCKET_PATH = "/tmp/fi-watchdog.sock"
+
+# mmaps of state files, opened lazily and kept for the process lifetime
+# (one entry per session when running as the daemon).
+_state_mms = {}
 
 
 def get_state_path(session_id):
     """State file for this session's watchdog counter."""
-    return f"/tmp/fi-watchdog-{session_id}.json"
+    return f"/tmp/fi-watchdog-{session_id}.state"
 
 
 def fresh_state(baseline_kb=0):
@@ -60,163 +145,347 @@ def fresh_state(baseline_kb=0):
         "baseline_kb": baseline_kb,
         "last_seen_kb": baseline_kb,
         "tool_calls_since_reset": 0,
-        "warnings_at_level": {"WARN": 0, "CRITICAL": 0, "BLOCK": 0},
+        "persisted_tool_calls": 0,
+        "warn_counts": [0, 0, 0, 0],
         "last_reset": time.time(),
+        "last_stat_mtime_ns": 0,
+        "last_inode": 0,
+        "resolved_transcript": "",
     }
 
 
-def read_state(session_id):
-    path = get_state_path(session_id)
+def _open_state_mm(state_path):
+    """Open (creating if needed) the state file and memory-map it."""
+    mm = _state_mms.get(state_path)
+    if mm is None:
+        fd = os.open(state_path, os.O_CREAT | os.O_RDWR, 0o600)
+        try:
+            if os.fstat(fd).st_size != STATE_FILE_SIZE:
+                os.ftruncate(fd, STATE_FILE_SIZE)
+            mm = mmap.mmap(fd, STATE_FILE_SIZE)
+        finally:
+            os.close(fd)
+        _state_mms[state_path] = mm
+    return mm
+
+
+def read_state(state_path):
     try:
-        with open(path, "r") as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
+        mm = _open_state_mm(state_path)
+    except OSError:
         return fresh_state()
+    (baseline, last_seen, last_reset, calls, persisted,
+     warn, crit, block, mtime_ns, inode) = struct.unpack_from(STATE_FMT, mm, 0)
+    return {
+        "baseline_kb": baseline,
+        "last_seen_kb": last_seen,
+        "last_reset": last_reset,
+        "tool_calls_since_reset": calls,
+        "persisted_tool_calls": persisted,
+        "warn_counts": [0, warn, crit, block],
+        "last_stat_mtime_ns": mtime_ns,
+        "last_inode": inode,
+        "resolved_transcript": (
+            mm[STATE_SIZE:STATE_FILE_SIZE].split(b"\x00", 1)[0].decode(
+                "utf-8", errors="replace"
+            )
+        ),
+    }
 
 
-def write_state(session_id, state):
-    path = get_state_path(session_id)
-    with open(path, "w") as f:
-        json.dump(state, f)
+def write_state(state_path, state):
+    try:
+        mm = _open_state_mm(state_path)
+    except OSError:
+        return
+    counts = state.get("warn_counts", (0, 0, 0, 0))
+    # Pack to a local buffer and copy in with one slice assignment so a
+    # concurrently reading hook can't observe a half-written struct the way
+    # it could observe a truncated file under the old open("w") JSON write.
+    buf = struct.pack(
+        STATE_FMT,
+        state.get("baseline_kb", 0),
+        state.get("last_seen_kb", 0),
+        state.get("last_reset", 0),
+        int(state.get("tool_calls_since_reset", 0)),
+        int(state.get("persisted_tool_calls", 0)),
+        int(counts[1]),
+        int(counts[2]),
+        int(counts[3]),
+        int(state.get("last_stat_mtime_ns", 0)),
+        int(state.get("last_inode", 0)),
+    )
+    mm[:STATE_SIZE] = buf
+    path_bytes = state.get("resolved_transcript", "").encode("utf-8")[:PATH_SLOT - 1]
+    mm[STATE_SIZE:STATE_FILE_SIZE] = path_bytes.ljust(PATH_SLOT, b"\x00")
+    mm.flush()
+
+
+def maybe_write_state(state_path, state, force=False, prev_seen_kb=None):
+    """Persist state, coalescing writes on the quiet path.
+
+    Skips the write unless forced (warning fired, risk elevated, /clear
+    detected), enough unpersisted tool calls have accumulated, or the
+    transcript has grown past a KB checkpoint since the last persist.
+    prev_seen_kb is the last_seen_kb value that was read from disk this
+    invocation (i.e. what is currently persisted).
+    """
+    delta = state["tool_calls_since_reset"] - state.get("persisted_tool_calls", 0)
+    if (
+        force
+        or delta >= DIRTY_THRESHOLD
+        or (
+            prev_seen_kb is not None
+            and (
+                prev_seen_kb < 50  # keep /clear detection seeded early on
+                or state["last_seen_kb"] - prev_seen_kb >= KB_CHECKPOINT
+            )
+        )
+    ):
+        state["persisted_tool_calls"] = state["tool_calls_since_reset"]
+        write_state(state_path, state)
 
 
-def get_transcript_size_kb(transcript_path):
-    """Get transcript file size in KB. Fast — just a stat call."""
+def get_transcript_size_kb(transcript_path, state):
+    """Get (size_kb, inode) for the transcript, reusing the last
+    measurement when the file hasn't changed (PreToolUse/PostToolUse
+    pairs stat the same path within one tool call). The inode comes for
+    free from the same stat and feeds /clear detection."""
     try:
         if transcript_path:
-            return os.path.getsize(transcript_path) / 1024
-    except (FileNotFoundError, OSError):
+            st = os.stat(transcript_path)
+            if st.st_mtime_ns == state.get("last_stat_mtime_ns"):
+                return state.get("last_seen_kb", 0), state.get("last_inode", 0)
+            state["last_stat_mtime_ns"] = st.st_mtime_ns
+            return st.st_size / 1024, st.st_ino
+    except OSError:
         pass
-    return 0
+    return 0, 0
 
 
 def classify_risk(growth_kb):
-    """Determine risk level from transcript growth since baseline."""
-    if growth_kb >= BLOCK_GROWTH_KB:
-        return "BLOCK"
-    if growth_kb >= CRITICAL_GROWTH_KB:
-        return "CRITICAL"
-    if growth_kb >= WARN_GROWTH_KB:
-        return "WARN"
-    return "OK"
+    """Risk level 0..3 from transcript growth — a branchless sum of
+    threshold comparisons instead of a string-returning if-cascade."""
+    return (
+        (growth_kb >= WARN_GROWTH_KB)
+        + (growth_kb >= CRITICAL_GROWTH_KB)
+        + (growth_kb >= BLOCK_GROWTH_KB)
+    )
 
 
-def should_emit_warning(state, risk):
+def should_emit_warning(state, level):
     """Throttle warnings to avoid flooding context."""
-    count = state["warnings_at_level"].get(risk, 0)
-    if risk == "BLOCK":
-        return count % BLOCK_EVERY_N == 0
-    if risk == "CRITICAL":
-        return count % CRITICAL_EVERY_N == 0
-    if risk == "WARN":
-        return count % WARN_EVERY_N == 0
-    return False
-
+    if level == 0:
+        return False
+    mask = EVERY_MASK[level]
+    if mask is not None:
+        return state["warn_counts"][level] & mask == 0
+    return state["warn_counts"][level] % EVERY_N[level] == 0
 
-def main():
-    # Read hook input from stdin
-    try:
-        raw = sys.stdin.read()
-        hook_input = json.loads(raw) if raw.strip() else {}
-    except (json.JSONDecodeError, ValueError):
-        sys.exit(0)
 
+def handle(hook_input):
+    """Process one hook payload and return the response bytes (b"" when
+    there is nothing to emit). Shared by the inline path and the daemon."""
     session_id = hook_input.get("session_id", "unknown")
+    state_path = get_state_path(session_id)
     event = hook_input.get("hook_event_name", "")
     transcript_path = hook_input.get("transcript_path")
     tool_name = hook_input.get("tool_name", "")
 
-    transcript_kb = get_transcript_size_kb(transcript_path)
-
     # --- SessionStart: reset watchdog state ---
     if event == "SessionStart":
-        write_state(session_id, fresh_state(transcript_kb))
-        sys.exit(0)
+        state = fresh_state()
+        if transcript_path:
+            transcript_path = os.path.realpath(transcript_path)
+            state["resolved_transcript"] = transcript_path
+        kb, inode = get_transcript_size_kb(transcript_path, state)
+        state["baseline_kb"] = kb
+        state["last_seen_kb"] = kb
+        state["last_inode"] = inode
+        write_state(state_path, state)
+        return b""
+
+    # --- PreToolUse on a non-blocked tool: no decision to make ---
+    # Skip the transcript stat and risk classification entirely; just bump
+    # the advisory counter. (hooks.json matches only blocked tools, but the
+    # guard keeps this path cheap if the matcher is ever widened.)
+    if event == "PreToolUse" and tool_name not in BLOCKED_TOOLS:
+        state = read_state(state_path)
+        state["tool_calls_since_reset"] = state.get("tool_calls_since_reset", 0) + 1
+        maybe_write_state(state_path, state)
+        return b""
 
     # --- Read state and detect /clear ---
-    state = read_state(session_id)
+    state = read_state(state_path)
     last_seen = state.get("last_seen_kb", 0)
-
-    # Auto-detect /clear: transcript size dropped significantly
-    if last_seen > 50 and transcript_kb < last_seen * (1 - CLEAR_DETECTION_DROP):
+    last_inode = state.get("last_inode", 0)
+    resolved = state.get("resolved_transcript") or transcript_path
+    transcript_kb, inode = get_transcript_size_kb(resolved, state)
+    if inode == 0 and transcript_path and resolved != transcript_path:
+        # Cached resolution went stale (transcript rotated) — re-resolve.
+        resolved = os.path.realpath(transcript_path)
+        state["resolved_transcript"] = resolved
+        transcript_kb, inode = get_transcript_size_kb(resolved, state)
+
+    # Auto-detect /clear: the transcript file was swapped out (inode
+    # changed) or its size dropped significantly
+    clear_detected = (
+        (last_inode and inode and inode != last_inode)
+        or (last_seen > 50 and transcript_kb < last_seen * (1 - CLEAR_DETECTION_DROP))
+    )
+    if clear_detected:
+        mtime_ns = state.get("last_stat_mtime_ns", 0)
+        resolved_path = state.get("resolved_transcript", "")
         state = fresh_state(transcript_kb)
+        state["last_stat_mtime_ns"] = mtime_ns
+        state["resolved_transcript"] = resolved_path
+    state["last_inode"] = inode
 
     state["tool_calls_since_reset"] = state.get("tool_calls_since_reset", 0) + 1
     state["last_seen_kb"] = transcript_kb
 
     baseline = state.get("baseline_kb", 0)
     growth_kb = max(0, transcript_kb - baseline)
-    risk = classify_risk(growth_kb)
+    level = classify_risk(growth_kb)
 
     # --- PreToolUse: block expensive operations when critical ---
     if event == "PreToolUse":
-        if risk == "BLOCK" and tool_name in BLOCKED_TOOLS:
-            write_state(session_id, state)
-            output = {
-                "hookSpecificOutput": {
-                    "hookEventName": "PreToolUse",
-                    "permissionDecision": "deny",
-                    "permissionDecisionReason": (
-                        f"CONTEXT WATCHDOG: BLOCKING {tool_name}. "
-                        f"Transcript grew {growth_kb:.0f}KB since last reset "
-                        f"(now {transcript_kb:.0f}KB total). Save state and "
-                        f"tell the user to /clear to resume."
-                    ),
-                },
-            }
-            json.dump(output, sys.stdout)
-            sys.exit(0)
+        if level == 3 and tool_name in BLOCKED_TOOLS:
+            write_state(state_path, state)
+            reason = (
+                f"CONTEXT WATCHDOG: BLOCKING {tool_name}. "
+                f"Transcript grew {growth_kb:.0f}KB since last reset "
+                f"(now {transcript_kb:.0f}KB total). Save state and "
+                f"tell the user to /clear to resume."
+            )
+            return _PRE_RESP % _dumps(reason)
 
-        write_state(session_id, state)
-        sys.exit(0)
+        maybe_write_state(
+            state_path, state,
+            force=clear_detected or level > 0,
+            prev_seen_kb=last_seen,
+        )
+        return b""
 
     # --- PostToolUse: inject warnings into Claude's context ---
     if event == "PostToolUse":
-        if risk != "OK" and should_emit_warning(state, risk):
+        if level > 0 and should_emit_warning(state, level):
             pct = min(99, int(growth_kb / TOTAL_CAPACITY_KB * 100))
+            msg = MESSAGES[level].format(pct, growth_kb)
 
-            if risk == "BLOCK":
-                msg = (
-                    f"Context watchdog: ~{pct}% capacity "
-                    f"(+{growth_kb:.0f}KB). Save state and /clear."
-                )
-            elif risk == "CRITICAL":
-                msg = (
-                    f"Context watchdog: ~{pct}% capacity "
-                    f"(+{growth_kb:.0f}KB). Finish current step, "
-                    f"save state, plan to /clear."
-                )
-            else:  # WARN
-                msg = (
-                    f"Context watchdog: ~{pct}% capacity "
-                    f"(+{growth_kb:.0f}KB)."
-                )
-
-            state.setdefault("warnings_at_level", {})
-            state["warnings_at_level"][risk] = (
-                state["warnings_at_level"].get(risk, 0) + 1
-            )
-            write_state(session_id, state)
-
-            output = {
-                "hookSpecificOutput": {
-                    "hookEventName": "PostToolUse",
-                    "additionalContext": msg,
-                },
-            }
-            json.dump(output, sys.stdout)
-            sys.exit(0)
+            state["warn_counts"][level] += 1
+            write_state(state_path, state)
+
+            return _POST_RESP % _dumps(msg)
 
         # Increment warning counter even when throttled
-        state.setdefault("warnings_at_level", {})
-        state["warnings_at_level"][risk] = (
-            state["warnings_at_level"].get(risk, 0) + 1
+        state["warn_counts"][level] += 1
+        maybe_write_state(
+            state_path, state,
+            force=clear_detected or level > 0,
+            prev_seen_kb=last_seen,
         )
-        write_state(session_id, state)
+        return b""
+
+    # Unknown event — nothing observable happened, don't persist anything
+    return b""
+
+
+def _recv_all(conn):
+    """Read from a socket until EOF."""
+    chunks = []
+    while True:
+        chunk = conn.recv(65536)
+        if not chunk:
+            return b"".join(chunks)
+        chunks.append(chunk)
+
+
+def try_daemon(raw):
+    """Forward a raw hook payload to the daemon, if one is listening.
+
+    Returns the response bytes, or None when no daemon is reachable (the
+    caller then processes inline). Connecting to a missing socket fails
+    immediately, so the no-daemon cost is negligible.
+    """
+    cli = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    cli.settimeout(0.5)
+    try:
+        cli.connect(SOCKET_PATH)
+        cli.sendall(raw)
+        cli.shutdown(socket.SHUT_WR)
+        return _recv_all(cli)
+    except OSError:
+        return None
+    finally:
+        cli.close()
+
+
+def run_daemon():
+    """Serve hook payloads over SOCKET_PATH, keeping state mmaps warm."""
+    try:
+        os.unlink(SOCKET_PATH)
+    except OSError:
+        pass
+    srv = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        srv.bind(SOCKET_PATH)
+    except OSError as e:
+        # Stale socket owned by another user, or a daemon already running
+        print(f"watchdog daemon: cannot bind {SOCKET_PATH}: {e}", file=sys.stderr)
+        sys.exit(1)
+    os.chmod(SOCKET_PATH, 0o600)
+    srv.listen(16)
+    while True:
+        conn, _addr = srv.accept()
+        try:
+            raw = _recv_all(conn)
+            resp = b""
+            if raw:
+                try:
+                    # The socket path is world-predictable, so a single
+                    # malformed payload must never take the daemon down
+                    resp = handle(_loads(raw))
+                except Exception:
+                    resp = b""
+            if resp:
+                conn.sendall(resp)
+        except OSError:
+            pass
+        finally:
+            conn.close()
+
+
+def main():
+    if "--daemon" in sys.argv[1:]:
+        run_daemon()
+        return
+
+    # Read hook input from stdin as raw bytes — both JSON parsers accept
+    # bytes, so skip TextIOWrapper's UTF-8 decode. PostToolUse payloads
+    # embed tool output and can exceed any single pipe read (and a pipe
+    # may return short reads regardless), so loop until EOF.
+    chunks = []
+    try:
+        while True:
+            chunk = os.read(0, 65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    except OSError:
+        sys.exit(0)
+    raw = b"".join(chunks)
+    if not raw:
         sys.exit(0)
 
-    # Unknown event
-    write_state(session_id, state)
+    resp = try_daemon(raw)
+    if resp is None:
+        try:
+            resp = handle(_loads(raw))
+        except ValueError:
+            sys.exit(0)
+    if resp:
+        os.write(1, resp)
     sys.exit(0)
 
 
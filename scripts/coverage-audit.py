@@ -23,12 +23,42 @@ Exits 0 if no gaps, 1 if gaps found.
 import argparse
 import json
 import math
+import mmap
 import os
+import multiprocessing
+import operator
+import pickle
 import re
 import sys
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
 from collections import defaultdict
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import NamedTuple
+
+try:
+    # Optional DFA regex engine (pip install google-re2). Matches the
+    # combined alternations in linear time with no backtracking; everything
+    # used here (anchors, classes, named groups) is within re2's subset.
+    import re2 as _re_engine
+except ImportError:
+    _re_engine = re
+
+try:
+    # Optional C JSON encoder (pip install orjson); serializing a large
+    # gaps/shared_elements result is a real slice of wall time.
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    # Optional multi-pattern matcher (pip install pyahocorasick). Lets the
+    # analysis index scan .md content once for all element names at once
+    # instead of tokenizing every identifier-looking word.
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
 # ---------------------------------------------------------------------------
 # Configuration
@@ -73,6 +103,11 @@ SKIP_ELEMENT_NAMES = {
     "index", "show", "new", "edit", "create", "store", "delete", "remove",
 }
 
+# Lowercased skip set for the hot path: membership is checked against the
+# name as-is first (no allocation when it is already lowercase) and against
+# name.lower() only for mixed-case names.
+SKIP_ELEMENT_NAMES_LOWER = frozenset(n.lower() for n in SKIP_ELEMENT_NAMES)
+
 # Minimum characters for an element name to be tracked
 MIN_ELEMENT_NAME_LENGTH = 3
 
@@ -80,6 +115,26 @@ MIN_ELEMENT_NAME_LENGTH = 3
 # definition file) to be flagged as shared infrastructure for Layer 2.
 SHARED_ELEMENT_MIN_CALLERS = 2
 
+# Below this many source files the fork/IPC cost of a process pool
+# outweighs the parallel regex win; extract serially instead.
+MIN_FILES_FOR_POOL = 64
+
+# Analysis .md files at or above this size are scanned through mmap so the
+# regex engine reads the page cache directly; smaller files read faster.
+MMAP_MIN_SIZE = 64 * 1024
+
+# Gap triage order for the final report sort
+SEVERITY_ORDER = {"CRITICAL": 0, "IMPORTANT": 1, "MINOR": 2, "TEST": 3}
+
+# Test-file naming conventions across the supported languages, unioned into
+# one compiled pattern so classification is a single search per filename.
+TEST_FILE_RE = re.compile(
+    r"Tests?\.(?:cs|js|ts|tsx)$"
+    r"|\.(?:test|spec)\.(?:js|ts|tsx|jsx)$"
+    r"|test_.*\.py$"
+    r"|.*_test\.(?:py|go)$"
+)
+
 # Coverage thresholds
 ADEQUATE_COVERAGE_PCT = 60  # >= 60% of elements covered = ADEQUATE
 SHALLOW_COVERAGE_PCT = 1    # > 0% but < 60% = SHALLOW, 0% = MISSING
@@ -88,117 +143,140 @@ SHALLOW_COVERAGE_PCT = 1    # > 0% but < 60% = SHALLOW, 0% = MISSING
 # Element extraction patterns by language family
 # ---------------------------------------------------------------------------
 
-# Each pattern is (compiled_regex, element_type).
-# The regex must have exactly one capturing group for the element name.
+# Each language family is a list of (pattern_source, element_type). Every
+# pattern source must have exactly one capturing group for the element name.
+# The sources are merged into a single alternation per extension so one
+# linear scan over the file yields all element kinds, instead of one pass
+# per pattern.
+
+def _rename_capture(src, group_name):
+    """Turn the single capturing group in a pattern source into a named one."""
+    for i, ch in enumerate(src):
+        if ch == "(" and src[i - 1 : i] != "\\" and src[i + 1 : i + 2] != "?":
+            return f"{src[:i]}(?P<{group_name}>{src[i + 1:]}"
+    raise ValueError(f"pattern has no capturing group: {src}")
+
+
+def _combine(pattern_list, flags=re.MULTILINE):
+    """Merge (source, type) pairs into one alternation with named groups.
+
+    Returns (compiled_regex, {group_name: element_type}). MULTILINE is safe
+    to apply across the board: sources without ^/$ anchors are unaffected.
+    """
+    alts = []
+    type_by_group = {}
+    for i, (src, elem_type) in enumerate(pattern_list):
+        group_name = f"n{i}"
+        alts.append(f"(?:{_rename_capture(src, group_name)})")
+        type_by_group[group_name] = elem_type
+    # Compiled over bytes: every pattern source is pure ASCII, and bytes
+    # matching skips UTF-8 decoding of source files entirely.
+    source = "|".join(alts).encode("ascii")
+    try:
+        compiled = _re_engine.compile(source, flags)
+    except Exception:
+        # re2 rejects patterns outside its subset; fall back per pattern.
+        compiled = re.compile(source, flags)
+    return compiled, type_by_group
+
 
 def _build_patterns():
-    """Build language-family → pattern list mapping."""
+    """Build extension → (combined_regex, group→type) mapping."""
     patterns = {}
 
     # --- JavaScript / TypeScript / JSX / TSX ---
-    js_ts = [
+    js_ts = _combine([
         # function declarations: function foo(
-        (re.compile(r'(?:export\s+)?(?:async\s+)?function\s+(\w+)\s*\('), "function"),
+        (r'(?:export\s+)?(?:async\s+)?function\s+(\w+)\s*\(', "function"),
         # arrow / function expression: const foo = (...) => / const foo = function
-        (re.compile(r'(?:export\s+)?(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s+)?(?:\([^)]*\)\s*=>|function\b)'), "function"),
+        (r'(?:export\s+)?(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s+)?(?:\([^)]*\)\s*=>|function\b)', "function"),
         # class declarations
-        (re.compile(r'(?:export\s+)?class\s+(\w+)'), "class"),
+        (r'(?:export\s+)?class\s+(\w+)', "class"),
         # method definitions in classes/objects: foo( or async foo(
-        (re.compile(r'^\s+(?:async\s+)?(\w+)\s*\([^)]*\)\s*\{', re.MULTILINE), "method"),
+        (r'^\s+(?:async\s+)?(\w+)\s*\([^)]*\)\s*\{', "method"),
         # Express/Koa/Hapi routes: app.get('/path' or router.post('/path'
-        (re.compile(r'(?:app|router)\.\w+\s*\(\s*[\'"]([^\'"]+)'), "route"),
+        (r'(?:app|router)\.\w+\s*\(\s*[\'"]([^\'"]+)', "route"),
         # React component (function): export default function Foo
-        (re.compile(r'export\s+default\s+function\s+(\w+)'), "component"),
-    ]
-    for ext in (".js", ".jsx", ".ts", ".tsx"):
+        (r'export\s+default\s+function\s+(\w+)', "component"),
+    ])
+    for ext in (".js", ".jsx", ".ts", ".tsx", ".vue", ".svelte"):
         patterns[ext] = js_ts
 
-    # --- Vue (script block uses JS/TS patterns) ---
-    patterns[".vue"] = js_ts[:]
-    # --- Svelte (script block uses JS/TS patterns) ---
-    patterns[".svelte"] = js_ts[:]
-
     # --- Python ---
-    py = [
-        (re.compile(r'^\s*def\s+(\w+)\s*\(', re.MULTILINE), "function"),
-        (re.compile(r'^\s*class\s+(\w+)', re.MULTILINE), "class"),
+    patterns[".py"] = _combine([
+        (r'^\s*def\s+(\w+)\s*\(', "function"),
+        (r'^\s*class\s+(\w+)', "class"),
         # Flask/FastAPI routes
-        (re.compile(r'@\w+\.(?:route|get|post|put|delete|patch)\s*\(\s*[\'"]([^\'"]+)'), "route"),
-    ]
-    patterns[".py"] = py
+        (r'@\w+\.(?:route|get|post|put|delete|patch)\s*\(\s*[\'"]([^\'"]+)', "route"),
+    ])
 
     # --- Ruby ---
-    rb = [
-        (re.compile(r'^\s*def\s+(\w+)', re.MULTILINE), "function"),
-        (re.compile(r'^\s*class\s+(\w+)', re.MULTILINE), "class"),
-        (re.compile(r'^\s*module\s+(\w+)', re.MULTILINE), "module"),
+    patterns[".rb"] = _combine([
+        (r'^\s*def\s+(\w+)', "function"),
+        (r'^\s*class\s+(\w+)', "class"),
+        (r'^\s*module\s+(\w+)', "module"),
         # Rails routes
-        (re.compile(r'(?:get|post|put|patch|delete)\s+[\'"]([^\'"]+)'), "route"),
-    ]
-    patterns[".rb"] = rb
+        (r'(?:get|post|put|patch|delete)\s+[\'"]([^\'"]+)', "route"),
+    ])
 
     # --- C# ---
-    cs = [
+    cs = _combine([
         # Methods: public async Task<Foo> BarMethod(
-        (re.compile(r'(?:public|private|protected|internal)\s+(?:static\s+)?(?:async\s+)?(?:override\s+)?(?:virtual\s+)?\S+\s+(\w+)\s*\('), "method"),
-        (re.compile(r'^\s*class\s+(\w+)', re.MULTILINE), "class"),
-        (re.compile(r'^\s*interface\s+(\w+)', re.MULTILINE), "interface"),
-        (re.compile(r'^\s*enum\s+(\w+)', re.MULTILINE), "enum"),
+        (r'(?:public|private|protected|internal)\s+(?:static\s+)?(?:async\s+)?(?:override\s+)?(?:virtual\s+)?\S+\s+(\w+)\s*\(', "method"),
+        (r'^\s*class\s+(\w+)', "class"),
+        (r'^\s*interface\s+(\w+)', "interface"),
+        (r'^\s*enum\s+(\w+)', "enum"),
         # ASP.NET routes
-        (re.compile(r'\[(?:Http(?:Get|Post|Put|Delete|Patch)|Route)\s*\(\s*"([^"]+)'), "route"),
-    ]
+        (r'\[(?:Http(?:Get|Post|Put|Delete|Patch)|Route)\s*\(\s*"([^"]+)', "route"),
+    ])
     patterns[".cs"] = cs
     patterns[".razor"] = cs
 
     # --- Java ---
-    java = [
-        (re.compile(r'(?:public|private|protected)\s+(?:static\s+)?(?:final\s+)?(?:synchronized\s+)?\S+\s+(\w+)\s*\('), "method"),
-        (re.compile(r'^\s*(?:public\s+)?class\s+(\w+)', re.MULTILINE), "class"),
-        (re.compile(r'^\s*(?:public\s+)?interface\s+(\w+)', re.MULTILINE), "interface"),
-        (re.compile(r'^\s*(?:public\s+)?enum\s+(\w+)', re.MULTILINE), "enum"),
+    patterns[".java"] = _combine([
+        (r'(?:public|private|protected)\s+(?:static\s+)?(?:final\s+)?(?:synchronized\s+)?\S+\s+(\w+)\s*\(', "method"),
+        (r'^\s*(?:public\s+)?class\s+(\w+)', "class"),
+        (r'^\s*(?:public\s+)?interface\s+(\w+)', "interface"),
+        (r'^\s*(?:public\s+)?enum\s+(\w+)', "enum"),
         # Spring routes
-        (re.compile(r'@(?:Get|Post|Put|Delete|Patch|Request)Mapping\s*\(\s*(?:value\s*=\s*)?[\'"]([^\'"]+)'), "route"),
-    ]
-    patterns[".java"] = java
+        (r'@(?:Get|Post|Put|Delete|Patch|Request)Mapping\s*\(\s*(?:value\s*=\s*)?[\'"]([^\'"]+)', "route"),
+    ])
 
     # --- Go ---
-    go = [
+    patterns[".go"] = _combine([
         # func FooBar(
-        (re.compile(r'^func\s+(\w+)\s*\(', re.MULTILINE), "function"),
+        (r'^func\s+(\w+)\s*\(', "function"),
         # func (r *Receiver) FooBar(
-        (re.compile(r'^func\s+\([^)]+\)\s+(\w+)\s*\(', re.MULTILINE), "method"),
-        (re.compile(r'^\s*type\s+(\w+)\s+struct', re.MULTILINE), "struct"),
-        (re.compile(r'^\s*type\s+(\w+)\s+interface', re.MULTILINE), "interface"),
-    ]
-    patterns[".go"] = go
+        (r'^func\s+\([^)]+\)\s+(\w+)\s*\(', "method"),
+        (r'^\s*type\s+(\w+)\s+struct', "struct"),
+        (r'^\s*type\s+(\w+)\s+interface', "interface"),
+    ])
 
     # --- PHP ---
-    php = [
-        (re.compile(r'(?:public|private|protected)?\s*(?:static\s+)?function\s+(\w+)\s*\('), "function"),
-        (re.compile(r'^\s*class\s+(\w+)', re.MULTILINE), "class"),
-        (re.compile(r'^\s*interface\s+(\w+)', re.MULTILINE), "interface"),
-    ]
-    patterns[".php"] = php
+    patterns[".php"] = _combine([
+        (r'(?:public|private|protected)?\s*(?:static\s+)?function\s+(\w+)\s*\(', "function"),
+        (r'^\s*class\s+(\w+)', "class"),
+        (r'^\s*interface\s+(\w+)', "interface"),
+    ])
 
     # --- C / C++ ---
-    c_cpp = [
+    c_cpp = _combine([
         # Function definitions (heuristic: type name( at start of line)
-        (re.compile(r'^(?:\w+[\s*]+)+(\w+)\s*\([^)]*\)\s*\{', re.MULTILINE), "function"),
-        (re.compile(r'^\s*class\s+(\w+)', re.MULTILINE), "class"),
-        (re.compile(r'^\s*struct\s+(\w+)', re.MULTILINE), "struct"),
-        (re.compile(r'^\s*enum\s+(?:class\s+)?(\w+)', re.MULTILINE), "enum"),
-        (re.compile(r'^\s*namespace\s+(\w+)', re.MULTILINE), "namespace"),
-    ]
+        (r'^(?:\w+[\s*]+)+(\w+)\s*\([^)]*\)\s*\{', "function"),
+        (r'^\s*class\s+(\w+)', "class"),
+        (r'^\s*struct\s+(\w+)', "struct"),
+        (r'^\s*enum\s+(?:class\s+)?(\w+)', "enum"),
+        (r'^\s*namespace\s+(\w+)', "namespace"),
+    ])
     for ext in (".c", ".cpp", ".h"):
         patterns[ext] = c_cpp
 
     # --- SQL ---
-    sql = [
-        (re.compile(r'CREATE\s+(?:OR\s+REPLACE\s+)?(?:TABLE|VIEW)\s+(?:\w+\.)?(\w+)', re.IGNORECASE), "table"),
-        (re.compile(r'CREATE\s+(?:OR\s+REPLACE\s+)?(?:FUNCTION|PROCEDURE)\s+(?:\w+\.)?(\w+)', re.IGNORECASE), "function"),
-        (re.compile(r'CREATE\s+(?:OR\s+REPLACE\s+)?TRIGGER\s+(?:\w+\.)?(\w+)', re.IGNORECASE), "trigger"),
-    ]
-    patterns[".sql"] = sql
+    patterns[".sql"] = _combine([
+        (r'CREATE\s+(?:OR\s+REPLACE\s+)?(?:TABLE|VIEW)\s+(?:\w+\.)?(\w+)', "table"),
+        (r'CREATE\s+(?:OR\s+REPLACE\s+)?(?:FUNCTION|PROCEDURE)\s+(?:\w+\.)?(\w+)', "function"),
+        (r'CREATE\s+(?:OR\s+REPLACE\s+)?TRIGGER\s+(?:\w+\.)?(\w+)', "trigger"),
+    ], flags=re.MULTILINE | re.IGNORECASE)
 
     return patterns
 
@@ -210,51 +288,195 @@ ELEMENT_PATTERNS = _build_patterns()
 # Element extraction
 # ---------------------------------------------------------------------------
 
-def extract_elements(file_path, extension):
+# Identifier-like tokens, shared by source indexing and the analysis index.
+# ASCII mode: the leading class is ASCII-only anyway, and skipping the
+# Unicode property tables makes \w and \b noticeably cheaper per byte.
+try:
+    IDENTIFIER_RE = _re_engine.compile(rb'\b([A-Za-z_]\w{2,})\b', re.ASCII)
+except Exception:
+    IDENTIFIER_RE = re.compile(rb'\b([A-Za-z_]\w{2,})\b', re.ASCII)
+
+
+class Element(NamedTuple):
+    """One extracted code element; far lighter than a per-element dict."""
+    name: str
+    type: str
+    line: int
+
+
+def extract_elements_from_content(content, extension):
     """
-    Extract named code elements from a source file.
-    Returns list of dicts: {name, type, line_number}.
+    Extract named code elements from already-loaded source content (bytes).
+    Returns a list of Element records.
     """
-    patterns = ELEMENT_PATTERNS.get(extension, [])
-    if not patterns:
-        return []
-
-    try:
-        with open(file_path, "r", errors="replace") as f:
-            content = f.read()
-    except OSError:
+    combined = ELEMENT_PATTERNS.get(extension)
+    if not combined:
         return []
+    pattern, type_by_group = combined
 
     elements = []
     seen_names = set()
+    # Newline offsets, built lazily on the first match: line numbers then
+    # cost a bisect each instead of re-counting the file prefix per match.
+    newline_offsets = None
+
+    for match in pattern.finditer(content):
+        # The name group of the matched alternative is its only named
+        # group, so lastgroup identifies both the name and the type.
+        group_name = match.lastgroup
+        if group_name is None:
+            continue
+        name = match.group(group_name).decode("ascii", "replace")
+        if (
+            not name
+            or len(name) < MIN_ELEMENT_NAME_LENGTH
+            or name in SKIP_ELEMENT_NAMES_LOWER
+            or (not name.islower() and name.lower() in SKIP_ELEMENT_NAMES_LOWER)
+        ):
+            continue
+        if name in seen_names:
+            continue
+        # Element names recur across the index sets and the caches;
+        # interning collapses duplicates to one object and lets set
+        # membership hit the pointer-equality fast path.
+        name = sys.intern(name)
+        seen_names.add(name)
 
-    for pattern, elem_type in patterns:
-        for match in pattern.finditer(content):
-            name = match.group(1)
-            if not name or len(name) < MIN_ELEMENT_NAME_LENGTH:
-                continue
-            if name.lower() in SKIP_ELEMENT_NAMES:
-                continue
-            if name in seen_names:
-                continue
-            seen_names.add(name)
-
-            # Calculate line number
-            line_num = content[:match.start()].count("\n") + 1
+        # Calculate line number
+        if newline_offsets is None:
+            newline_offsets = [m.start() for m in re.finditer(b"\n", content)]
+        line_num = bisect_left(newline_offsets, match.start()) + 1
 
-            elements.append({
-                "name": name,
-                "type": elem_type,
-                "line": line_num,
-            })
+        elements.append(Element(name, type_by_group[group_name], line_num))
 
     return elements
 
 
+def tokenize_identifiers(content):
+    """All identifier-like tokens in a source buffer (bytes), deduplicated.
+
+    Tokens come back as str: downstream indices are queried with element
+    names, and deduping before decoding keeps the decode count minimal.
+    """
+    return {t.decode("ascii", "replace") for t in set(IDENTIFIER_RE.findall(content))}
+
+
+# Bump when the shape of cached records changes; stale pickles are dropped.
+_CACHE_FORMAT = 2
+
+# Per-file parse results memoized across runs, keyed by (mtime_ns, size).
+# Populated from the on-disk cache before Phase 2; fork-based pool workers
+# inherit it read-only and the parent persists the refreshed entries.
+_file_cache = {}  # abs_path → (stat_key, elements, identifier_set)
+
+
+def _load_cache(path):
+    """Load the on-disk parse cache; any failure means a cold start."""
+    try:
+        with open(path, "rb") as f:
+            cache = pickle.load(f)
+    except (OSError, EOFError, pickle.PickleError, AttributeError):
+        return {}
+    if cache.get("format") != _CACHE_FORMAT:
+        return {}
+    return cache
+
+
+def _save_cache(path, cache):
+    """Persist the parse cache atomically; failures are non-fatal."""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp.{os.getpid()}"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(cache, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
+def _process_file(sf):
+    """Read one source file and extract elements + identifier tokens.
+
+    Top-level so it can be dispatched to worker processes; returns
+    (rel_path, elements, identifier_set, line_count, stat_key). The line
+    count comes from the same read that feeds extraction, and unchanged
+    files are served from the parse cache without re-reading.
+    """
+    abs_path = sf["abs_path"]
+    try:
+        st = os.stat(abs_path)
+        stat_key = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        stat_key = None
+    if stat_key is not None:
+        cached = _file_cache.get(abs_path)
+        if cached is not None and cached[0] == stat_key and len(cached) == 4:
+            return sf["file"], cached[1], cached[2], cached[3], stat_key
+    try:
+        with open(abs_path, "rb") as f:
+            content = f.read()
+    except OSError:
+        content = b""
+    elements = extract_elements_from_content(content, sf["extension"])
+    line_count = content.count(b"\n")
+    if content and not content.endswith(b"\n"):
+        line_count += 1
+    return sf["file"], elements, tokenize_identifiers(content), line_count, stat_key
+
+
 # ---------------------------------------------------------------------------
 # Analysis index
 # ---------------------------------------------------------------------------
 
+# Filenames mentioned in analysis text, e.g. "foo.js", "bar.py".
+FILENAME_RE = re.compile(rb'(\w+\.\w+)', re.ASCII)
+
+
+def _scan_md_buffer(buf, automaton):
+    """Extract (identifier_set, filename_set) from one analysis buffer.
+
+    `buf` may be bytes or an mmap; both feed the regex engine directly.
+    """
+    if automaton is not None:
+        # The automaton holds str element names; one decode per file
+        # replaces tokenization.
+        idents = _match_targets(automaton, bytes(buf).decode("utf-8", "replace"))
+    else:
+        # Whole-buffer findall + set dedupe: one C-level scan per file,
+        # and each distinct token updates the index once instead of once
+        # per occurrence.
+        idents = {
+            t.decode("ascii", "replace")
+            for t in set(IDENTIFIER_RE.findall(buf))
+        }
+    filenames = {
+        t.decode("ascii", "replace")
+        for t in set(FILENAME_RE.findall(buf))
+    }
+    return idents, filenames
+
+
+def _match_targets(automaton, content):
+    """Aho-Corasick scan for target names, keeping whole-word hits only."""
+    matched = set()
+    content_len = len(content)
+    for end, name in automaton.iter(content):
+        if name in matched:
+            continue
+        start = end - len(name) + 1
+        if start > 0:
+            prev = content[start - 1]
+            if prev.isalnum() or prev == "_":
+                continue
+        nxt = end + 1
+        if nxt < content_len:
+            nxt_ch = content[nxt]
+            if nxt_ch.isalnum() or nxt_ch == "_":
+                continue
+        matched.add(name)
+    return matched
+
+
 class AnalysisIndex:
     """
     Builds an in-memory index of all identifiers found in analysis output
@@ -269,73 +491,120 @@ class AnalysisIndex:
         self._filename_index = defaultdict(set)
         self._built = False
 
-    def build(self, *directories):
-        """Walk directories, read all .md files, extract identifiers."""
-        identifier_re = re.compile(r'\b([A-Za-z_]\w{2,})\b')
+    def build(self, *directories, cache=None, target_names=None):
+        """Walk directories, read all .md files, extract identifiers.
+
+        `cache` maps fpath → (stat_key, identifier_set, filename_set) from a
+        previous run; unchanged files skip re-reading. The refreshed entries
+        are left on `self.cache_entries` for the caller to persist.
+
+        When pyahocorasick is installed and `target_names` is given, the
+        index only tracks those names: one automaton pass per file replaces
+        whole-buffer tokenization. Matches are boundary-checked so coverage
+        answers stay identical to the tokenized path. The parse cache is
+        bypassed in that mode since its entries are target-independent
+        token sets.
+        """
+        if cache is None:
+            cache = {}
+        self.cache_entries = {}
+
+        # Fast path for empty or missing analysis output: nothing to walk,
+        # and lookups below short-circuit on the empty indices.
+        directories = [d for d in directories if os.path.isdir(d)]
+        if not directories:
+            self._built = True
+            return
+
+        # Guards against overlapping directories (e.g. details/ nested
+        # under raw/): each physical file is indexed once, keyed by inode.
+        seen_files = set()
+
+        automaton = None
+        if ahocorasick is not None and target_names:
+            automaton = ahocorasick.Automaton()
+            for name in target_names:
+                # Only identifier-like names can ever appear in the token
+                # index; keeping that restriction preserves behaviour for
+                # route-style names containing '/'.
+                if re.fullmatch(r'[A-Za-z_]\w{2,}', name):
+                    automaton.add_word(name, name)
+            if len(automaton) > 0:
+                automaton.make_automaton()
+            else:
+                automaton = None
 
         for directory in directories:
-            if not os.path.isdir(directory):
-                continue
             for root, _dirs, files in os.walk(directory):
                 for fname in files:
                     if not fname.endswith(".md"):
                         continue
                     fpath = os.path.join(root, fname)
                     try:
-                        with open(fpath, "r", errors="replace") as f:
-                            for line in f:
-                                for m in identifier_re.finditer(line):
-                                    ident = m.group(1)
-                                    self._index[ident].add(fpath)
-                                # Also index filenames mentioned in analysis
-                                # Match patterns like "foo.js", "bar.py", etc.
-                                for fm in re.finditer(r'(\w+\.\w+)', line):
-                                    self._filename_index[fm.group(1)].add(fpath)
+                        st = os.stat(fpath)
+                        stat_key = (st.st_mtime_ns, st.st_size)
                     except OSError:
                         continue
+                    file_id = (st.st_dev, st.st_ino)
+                    if file_id in seen_files:
+                        continue
+                    seen_files.add(file_id)
+                    cached = cache.get(fpath) if automaton is None else None
+                    if cached is not None and cached[0] == stat_key:
+                        idents, filenames = cached[1], cached[2]
+                    else:
+                        try:
+                            with open(fpath, "rb") as f:
+                                if stat_key[1] >= MMAP_MIN_SIZE:
+                                    with mmap.mmap(
+                                        f.fileno(), 0, access=mmap.ACCESS_READ,
+                                    ) as mm:
+                                        idents, filenames = _scan_md_buffer(
+                                            mm, automaton,
+                                        )
+                                else:
+                                    idents, filenames = _scan_md_buffer(
+                                        f.read(), automaton,
+                                    )
+                        except (OSError, ValueError):
+                            continue
+                    if automaton is None:
+                        self.cache_entries[fpath] = (stat_key, idents, filenames)
+                    # Interned keys/values: the same identifier and path
+                    # strings repeat across thousands of entries.
+                    fpath = sys.intern(fpath)
+                    for ident in idents:
+                        self._index[sys.intern(ident)].add(fpath)
+                    for mentioned in filenames:
+                        self._filename_index[sys.intern(mentioned)].add(fpath)
 
         self._built = True
 
     def is_element_covered(self, element_name):
         """Check if an element name appears anywhere in the analysis."""
+        if not self._index:
+            return False
         return element_name in self._index and len(self._index[element_name]) > 0
 
     def is_filename_mentioned(self, filename):
         """Check if a source filename appears anywhere in the analysis."""
+        if not self._filename_index:
+            return False
         return filename in self._filename_index and len(self._filename_index[filename]) > 0
 
     def element_locations(self, element_name):
         """Return set of analysis files that mention this element."""
         return self._index.get(element_name, set())
 
+    def covered_names(self):
+        """View of every name the analysis mentions, for C-level set ops."""
+        return self._index.keys()
+
 
 # ---------------------------------------------------------------------------
 # Shared element detection
 # ---------------------------------------------------------------------------
 
-def build_codebase_identifier_index(source_files):
-    """
-    For every source file, extract all identifier-like tokens. Returns a dict:
-    identifier → set of file paths that contain it.
-
-    Used to find elements referenced from multiple files (shared infrastructure).
-    """
-    identifier_re = re.compile(r'\b([A-Za-z_]\w{2,})\b')
-    index = defaultdict(set)
-
-    for sf in source_files:
-        fpath = sf["abs_path"]
-        try:
-            with open(fpath, "r", errors="replace") as f:
-                for line in f:
-                    for m in identifier_re.finditer(line):
-                        index[m.group(1)].add(sf["file"])
-        except OSError:
-            continue
-
-    return index
-
-
 def detect_shared_elements(all_elements_by_file, codebase_index):
     """
     Identify elements that are defined in one file but referenced from multiple
@@ -344,11 +613,14 @@ def detect_shared_elements(all_elements_by_file, codebase_index):
     Returns list of dicts:
     {name, type, defined_in, callers: [file_paths], caller_count}
     """
+    if not all_elements_by_file or not codebase_index:
+        return []
+
     shared = []
 
     for file_rel_path, elements in all_elements_by_file.items():
         for elem in elements:
-            name = elem["name"]
+            name = elem.name
             # Skip short or common-looking names that would produce noise
             if len(name) < 4:
                 continue
@@ -356,17 +628,20 @@ def detect_shared_elements(all_elements_by_file, codebase_index):
             if name.islower() and "_" not in name:
                 continue
 
-            # Find all files that reference this identifier
-            referencing_files = codebase_index.get(name, set())
-            # Exclude the definition file itself
-            callers = sorted(f for f in referencing_files if f != file_rel_path)
-
-            if len(callers) >= SHARED_ELEMENT_MIN_CALLERS:
+            # Find all files that reference this identifier. Count first,
+            # excluding the definition file arithmetically, and only sort
+            # a materialized caller list for rows that qualify.
+            referencing_files = codebase_index.get(name)
+            if referencing_files is None:
+                continue
+            caller_count = len(referencing_files) - (file_rel_path in referencing_files)
+            if caller_count >= SHARED_ELEMENT_MIN_CALLERS:
+                callers = sorted(referencing_files - {file_rel_path})
                 shared.append({
                     "name": name,
-                    "type": elem["type"],
+                    "type": elem.type,
                     "defined_in": file_rel_path,
-                    "line": elem["line"],
+                    "line": elem.line,
                     "callers": callers,
                     "caller_count": len(callers),
                 })
@@ -380,59 +655,129 @@ def detect_shared_elements(all_elements_by_file, codebase_index):
 # Source file enumeration
 # ---------------------------------------------------------------------------
 
-def count_lines(file_path):
-    """Count lines in a file."""
-    try:
-        with open(file_path, "r", errors="replace") as f:
-            return sum(1 for _ in f)
-    except (OSError, UnicodeDecodeError):
-        return 0
-
-
-def should_exclude(file_path, exclude_patterns):
-    """Check if a file path matches any exclude pattern."""
-    path_str = str(file_path)
-    parts = Path(file_path).parts
-    for part in parts:
-        if part in DEFAULT_EXCLUDE_DIRS:
-            return True
-    for pattern in exclude_patterns:
-        if pattern in path_str:
-            return True
-    return False
-
-
-def enumerate_source_files(repo_path, exclude_patterns):
-    """Walk the filesystem and find all source files with line counts."""
+class ExcludeMatcher:
+    """Callable testing whether a path contains any exclude substring.
+
+    Backed by an Aho-Corasick automaton when pyahocorasick is installed —
+    one linear scan over the path regardless of pattern count — with a
+    combined escaped-alternation regex as the stdlib fallback. Reduces to
+    its pattern list so it can cross process boundaries for the parallel
+    repo enumeration.
+    """
+
+    def __init__(self, patterns):
+        self._patterns = tuple(patterns)
+        if ahocorasick is not None:
+            automaton = ahocorasick.Automaton()
+            for pattern in self._patterns:
+                automaton.add_word(pattern, True)
+            automaton.make_automaton()
+            self._automaton = automaton
+            self._regex = None
+        else:
+            self._automaton = None
+            self._regex = re.compile("|".join(map(re.escape, self._patterns)))
+
+    def __call__(self, path):
+        if self._automaton is not None:
+            return next(self._automaton.iter(path), None) is not None
+        return self._regex.search(path) is not None
+
+    def __reduce__(self):
+        return (self.__class__, (self._patterns,))
+
+
+def compile_exclude_patterns(exclude_patterns):
+    """Build the exclude-path matcher (or None when no patterns)."""
+    if not exclude_patterns:
+        return None
+    return ExcludeMatcher(exclude_patterns)
+
+
+def _dir_should_prune(name, path, exclude_match):
+    """Decide during descent whether to skip a directory subtree."""
+    if name in DEFAULT_EXCLUDE_DIRS:
+        return True
+    return exclude_match is not None and exclude_match(path)
+
+
+def should_exclude(file_path, exclude_match):
+    """Check if a file path matches any exclude pattern.
+
+    Directory-name exclusion happens during descent (_dir_should_prune),
+    so files never reach this check through an excluded directory and
+    only the pattern match remains.
+    """
+    return exclude_match is not None and exclude_match(file_path)
+
+
+def _walk_source_entries(root, exclude_match):
+    """Yield DirEntry objects for files under root, pruning excluded dirs.
+
+    scandir-based so directory-ness comes from the DirEntry itself instead
+    of an extra stat per name, and no intermediate name lists are built.
+    An explicit stack replaces recursion: deep trees cost one list entry
+    per pending directory instead of a chain of suspended generator frames.
+    """
+    stack = [root]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                if is_dir:
+                    if _dir_should_prune(entry.name, entry.path, exclude_match):
+                        continue
+                    stack.append(entry.path)
+                else:
+                    yield entry
+
+
+def enumerate_source_files(repo_path, exclude_match):
+    """Walk the filesystem and find all source files.
+
+    Line counts are filled in during Phase 2, which reads each file
+    anyway; empty files are dropped at that point.
+    """
     source_files = []
-    repo_path = Path(repo_path).resolve()
+    repo_path = os.path.realpath(repo_path)
 
-    for root, dirs, files in os.walk(repo_path):
-        dirs[:] = [
-            d for d in dirs
-            if d not in DEFAULT_EXCLUDE_DIRS
-            and not should_exclude(os.path.join(root, d), exclude_patterns)
-        ]
+    for entry in _walk_source_entries(repo_path, exclude_match):
+        fname = entry.name
+        dot = fname.rfind(".")
+        if dot < 0:
+            continue
+        ext = fname[dot:].lower()
+        if ext not in SOURCE_EXTENSIONS:
+            continue
 
-        for fname in files:
-            ext = Path(fname).suffix.lower()
-            if ext not in SOURCE_EXTENSIONS:
+        # DirEntry carries the stat from the directory read on Linux, so
+        # rejecting empty files here costs nothing and saves Phase 2 an
+        # open/read just to discover a zero line count.
+        try:
+            if entry.stat(follow_symlinks=False).st_size == 0:
                 continue
+        except OSError:
+            continue
 
-            full_path = os.path.join(root, fname)
-            if should_exclude(full_path, exclude_patterns):
-                continue
+        full_path = entry.path
+        if should_exclude(full_path, exclude_match):
+            continue
 
-            line_count = count_lines(full_path)
-            if line_count > 0:
-                rel_path = os.path.relpath(full_path, repo_path)
-                source_files.append({
-                    "file": rel_path,
-                    "abs_path": full_path,
-                    "source_lines": line_count,
-                    "repo_path": str(repo_path),
-                    "extension": ext,
-                })
+        source_files.append({
+            "file": os.path.relpath(full_path, repo_path),
+            "abs_path": full_path,
+            "basename": fname,
+            "is_test": TEST_FILE_RE.search(fname) is not None,
+            "repo_path": repo_path,
+            "extension": ext,
+        })
 
     return source_files
 
@@ -450,7 +795,7 @@ def check_file_coverage(source_file, elements, analysis_index):
 
     Returns dict with coverage details.
     """
-    filename = os.path.basename(source_file["file"])
+    filename = source_file["basename"]
 
     if not elements:
         # No extractable elements — fall back to filename mention
@@ -464,17 +809,14 @@ def check_file_coverage(source_file, elements, analysis_index):
             "method": "filename_fallback",
         }
 
-    covered = []
-    missing = []
-
-    for elem in elements:
-        if analysis_index.is_element_covered(elem["name"]):
-            covered.append(elem["name"])
-        else:
-            missing.append(elem["name"])
+    # One set intersection against the index keys replaces a method call
+    # and two dict probes per element; the missing list keeps element order.
+    names = [elem.name for elem in elements]
+    covered_set = set(names) & analysis_index.covered_names()
+    missing = [n for n in names if n not in covered_set]
 
     total = len(elements)
-    covered_count = len(covered)
+    covered_count = len(covered_set)
     pct = (covered_count / total * 100) if total > 0 else 0
 
     if pct >= ADEQUATE_COVERAGE_PCT:
@@ -501,17 +843,9 @@ def check_file_coverage(source_file, elements, analysis_index):
 def classify_gap(source_file, status, coverage_result):
     """Classify a gap by severity for triage."""
     source_lines = source_file["source_lines"]
-    filename = os.path.basename(source_file["file"])
-
-    # Test file detection
-    test_patterns = [
-        r"Tests?\.cs$", r"Tests?\.js$", r"Tests?\.ts$", r"Tests?\.tsx$",
-        r"\.test\.(js|ts|tsx|jsx)$", r"\.spec\.(js|ts|tsx|jsx)$",
-        r"test_.*\.py$", r".*_test\.py$", r".*_test\.go$",
-    ]
-    is_test = any(re.search(p, filename) for p in test_patterns)
 
-    if is_test:
+    # Test files were flagged during enumeration
+    if source_file["is_test"]:
         return "TEST"
 
     missing_count = len(coverage_result["elements_missing"])
@@ -534,44 +868,129 @@ def classify_gap(source_file, status, coverage_result):
 # Main audit
 # ---------------------------------------------------------------------------
 
-def run_audit(plan, raw_dir, details_dir, extra_exclude_patterns):
+def run_audit(plan, raw_dir, details_dir, extra_exclude_patterns, cache_path=None):
     """Run the full coverage audit across all repos in the plan."""
+    global _file_cache
+
+    cache = _load_cache(cache_path) if cache_path else {}
+    _file_cache = cache.get("source", {})
 
     # Collect exclude patterns
     exclude_patterns = list(extra_exclude_patterns)
     if "exclude_patterns" in plan:
         exclude_patterns.extend(plan["exclude_patterns"])
+    exclude_match = compile_exclude_patterns(exclude_patterns)
 
     # --- Phase 1: Enumerate source files ---
-    all_source_files = []
+    # Enumeration is independent per repo, so multi-repo plans walk their
+    # trees in parallel; the serial path covers single-repo plans and
+    # environments without fork.
+    valid_repos = []
     for repo in plan.get("repos", []):
-        repo_path = repo["path"]
-        repo_name = repo["name"]
-
-        if not os.path.isdir(repo_path):
-            print(f"WARNING: repo path does not exist: {repo_path}", file=sys.stderr)
+        if not os.path.isdir(repo["path"]):
+            print(f"WARNING: repo path does not exist: {repo['path']}", file=sys.stderr)
             continue
+        valid_repos.append(repo)
 
-        files = enumerate_source_files(repo_path, exclude_patterns)
+    repo_file_lists = None
+    if len(valid_repos) > 1:
+        try:
+            ctx = multiprocessing.get_context("fork")
+            with ProcessPoolExecutor(
+                max_workers=min(len(valid_repos), os.cpu_count() or 1),
+                mp_context=ctx,
+            ) as executor:
+                repo_file_lists = list(executor.map(
+                    enumerate_source_files,
+                    [repo["path"] for repo in valid_repos],
+                    [exclude_match] * len(valid_repos),
+                ))
+        except (OSError, ValueError):
+            repo_file_lists = None
+    if repo_file_lists is None:
+        repo_file_lists = [
+            enumerate_source_files(repo["path"], exclude_match)
+            for repo in valid_repos
+        ]
+
+    all_source_files = []
+    for repo, files in zip(valid_repos, repo_file_lists):
+        # One shared object per repo name across every record and gap row.
+        # Status/severity values are string literals, which CPython already
+        # interns; repo names come from plan.json and are not.
+        repo_name = sys.intern(repo["name"])
         for f in files:
             f["repo_name"] = repo_name
         all_source_files.extend(files)
 
-    total_source_files = len(all_source_files)
-    total_source_lines = sum(f["source_lines"] for f in all_source_files)
-
     # --- Phase 2: Extract elements from every source file ---
+    # Each file is read exactly once; the same buffer feeds element
+    # extraction and the identifier index used for shared-element detection.
+    # Extraction is CPU-bound on the regex engine and independent per file,
+    # so large audits fan out across cores.
     all_elements_by_file = {}  # rel_path → [elements]
+    codebase_index = defaultdict(set)  # identifier → set of rel_paths
     total_elements = 0
 
-    for sf in all_source_files:
-        elements = extract_elements(sf["abs_path"], sf["extension"])
-        all_elements_by_file[sf["file"]] = elements
+    results = None
+    if len(all_source_files) >= MIN_FILES_FOR_POOL:
+        try:
+            # fork keeps the compiled ELEMENT_PATTERNS shared with workers
+            # and avoids re-importing this script in children.
+            ctx = multiprocessing.get_context("fork")
+            with ProcessPoolExecutor(mp_context=ctx) as executor:
+                results = list(executor.map(
+                    _process_file, all_source_files, chunksize=32,
+                ))
+        except (OSError, ValueError):
+            results = None
+    if results is None:
+        results = [_process_file(sf) for sf in all_source_files]
+
+    new_source_cache = {}
+    surviving_files = []
+    for sf, (rel_path, elements, identifiers, line_count, stat_key) in zip(
+        all_source_files, results
+    ):
+        if stat_key is not None:
+            new_source_cache[sf["abs_path"]] = (
+                stat_key, elements, identifiers, line_count,
+            )
+        if line_count <= 0:
+            continue
+        sf["source_lines"] = line_count
+        surviving_files.append(sf)
+        # Intern here in the parent: strings coming back from pool workers
+        # are unpickled copies, so worker-side interning would not stick.
+        rel_path = sys.intern(rel_path)
+        all_elements_by_file[rel_path] = elements
         total_elements += len(elements)
+        for token in identifiers:
+            codebase_index[sys.intern(token)].add(rel_path)
+    all_source_files = surviving_files
+
+    total_source_files = len(all_source_files)
+    total_source_lines = sum(f["source_lines"] for f in all_source_files)
 
     # --- Phase 3: Build analysis index ---
+    all_element_names = {
+        elem.name
+        for elements in all_elements_by_file.values()
+        for elem in elements
+    }
     analysis_index = AnalysisIndex()
-    analysis_index.build(raw_dir, details_dir)
+    analysis_index.build(
+        raw_dir, details_dir,
+        cache=cache.get("analysis", {}),
+        target_names=all_element_names,
+    )
+
+    if cache_path:
+        _save_cache(cache_path, {
+            "format": _CACHE_FORMAT,
+            "source": new_source_cache,
+            "analysis": analysis_index.cache_entries,
+        })
 
     # --- Phase 4: Check element coverage per file ---
     coverage_counts = {"adequate": 0, "shallow": 0, "missing": 0}
@@ -590,7 +1009,16 @@ def run_audit(plan, raw_dir, details_dir, extra_exclude_patterns):
             bucket = result["status"].lower()
             coverage_counts[bucket] = coverage_counts.get(bucket, 0) + 1
             severity = classify_gap(sf, result["status"], result)
-            gaps.append({
+            # Precomputed sort key packed into one int: severity rank,
+            # then descending missing-element count, then descending file
+            # size (both clamped to 24 bits). A single int compares
+            # faster than a tuple and costs no per-comparison work.
+            sort_key = (
+                (SEVERITY_ORDER.get(severity, 99) << 48)
+                | ((0xFFFFFF - min(len(result["elements_missing"]), 0xFFFFFF)) << 24)
+                | (0xFFFFFF - min(sf["source_lines"], 0xFFFFFF))
+            )
+            gaps.append((sort_key, {
                 "file": sf["file"],
                 "repo": sf["repo_name"],
                 "source_lines": sf["source_lines"],
@@ -601,18 +1029,12 @@ def run_audit(plan, raw_dir, details_dir, extra_exclude_patterns):
                 "status": result["status"],
                 "severity": severity,
                 "method": result["method"],
-            })
+            }))
 
-    # Sort gaps: CRITICAL first, then by missing element count
-    severity_order = {"CRITICAL": 0, "IMPORTANT": 1, "MINOR": 2, "TEST": 3}
-    gaps.sort(key=lambda g: (
-        severity_order.get(g["severity"], 99),
-        -len(g.get("elements_missing", [])),
-        -g["source_lines"],
-    ))
+    gaps.sort(key=operator.itemgetter(0))
+    gaps = [gap for _key, gap in gaps]
 
     # --- Phase 5: Detect shared elements ---
-    codebase_index = build_codebase_identifier_index(all_source_files)
     shared_elements = detect_shared_elements(all_elements_by_file, codebase_index)
 
     # --- Phase 6: Build triage summary ---
@@ -651,6 +1073,33 @@ def run_audit(plan, raw_dir, details_dir, extra_exclude_patterns):
 # CLI
 # ---------------------------------------------------------------------------
 
+def _write_result_stdlib(output_path, result):
+    """Stream the result to disk without one giant serialized string.
+
+    Scalar fields and small sections go through json.dump directly; the
+    gaps and shared_elements arrays are written row by row so peak memory
+    stays at one row's worth of JSON instead of the whole document."""
+    with open(output_path, "w") as f:
+        f.write("{")
+        first = True
+        for key, value in result.items():
+            if not first:
+                f.write(",")
+            first = False
+            f.write(f"\n  {json.dumps(key)}: ")
+            if key in ("gaps", "shared_elements") and value:
+                f.write("[\n")
+                last = len(value) - 1
+                for i, item in enumerate(value):
+                    f.write("    ")
+                    json.dump(item, f)
+                    f.write(",\n" if i != last else "\n")
+                f.write("  ]")
+            else:
+                json.dump(value, f, indent=2)
+        f.write("\n}\n")
+
+
 def parse_args():
     parser = argparse.ArgumentParser(description="Feature inventory coverage audit")
     parser.add_argument("--plan", required=True, help="Path to plan.json")
@@ -673,13 +1122,19 @@ def main():
     with open(plan_path, "r") as f:
         plan = json.load(f)
 
-    result = run_audit(plan, args.raw_dir, args.details_dir, args.exclude_patterns or [])
+    output_path = Path(args.output)
+    cache_path = str(output_path.parent / ".cache" / "coverage-audit.pickle")
+    result = run_audit(
+        plan, args.raw_dir, args.details_dir, args.exclude_patterns or [],
+        cache_path=cache_path,
+    )
 
     # Write output
-    output_path = Path(args.output)
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(output_path, "w") as f:
-        json.dump(result, f, indent=2)
+    if orjson is not None:
+        output_path.write_bytes(orjson.dumps(result, option=orjson.OPT_INDENT_2))
+    else:
+        _write_result_stdlib(output_path, result)
 
     # Print summary to stderr for the orchestrator
     total = result["total_source_files"]
@@ -14,9 +14,16 @@ CRITICAL: Symbol names are extracted via node.text.decode('utf-8'), never manual
 """
 
 import argparse
+import functools
 import json
+from bisect import bisect_left
 import logging
+import multiprocessing
+import os
+import pickle
+import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
@@ -28,6 +35,24 @@ except ImportError:
     print("ERROR: tree-sitter-languages is required. Install with: pip install tree-sitter-languages", file=sys.stderr)
     sys.exit(1)
 
+try:
+    import ahocorasick
+except ImportError:  # optional accelerator; fallback below is stdlib-only
+    ahocorasick = None
+
+try:
+    import orjson
+except ImportError:  # optional accelerator; stdlib json fallback below
+    orjson = None
+
+if orjson is not None:
+    def _dump_line(obj):
+        """Encode one JSONL record to bytes, newline included."""
+        return orjson.dumps(obj) + b"\n"
+else:
+    def _dump_line(obj):
+        return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
 # --- Language configuration ---
 
 EXTENSION_TO_LANG = {
@@ -80,6 +105,59 @@ LANG_SYMBOL_TYPES = {
     },
 }
 
+# Node types whose subtrees can still contain symbols we report at the
+# top level. The symbol walk only descends through these (plus ERROR
+# recovery nodes); loops, call chains, and other expression trees cannot
+# introduce reportable symbols, so their subtrees are skipped outright.
+# Languages not listed fall back to unrestricted descent.
+LANG_CONTAINER_TYPES = {
+    # Statement wrappers (if/try/loops/switch/labeled) descend for the
+    # same reasons as Python's: conditional definitions and fallback
+    # requires live inside them
+    "javascript": {"program", "statement_block", "if_statement", "else_clause",
+                   "try_statement", "catch_clause", "finally_clause",
+                   "for_statement", "for_in_statement", "while_statement",
+                   "do_statement", "switch_statement", "switch_body",
+                   "switch_case", "switch_default", "labeled_statement",
+                   "ERROR"},
+    # expression_statement is the wrapper the grammar puts around
+    # internal_module (namespace Outer {...}), so it must descend too
+    "typescript": {"program", "statement_block", "internal_module", "module",
+                   "ambient_declaration", "expression_statement",
+                   "if_statement", "else_clause", "try_statement",
+                   "catch_clause", "finally_clause", "for_statement",
+                   "for_in_statement", "while_statement", "do_statement",
+                   "switch_statement", "switch_body", "switch_case",
+                   "switch_default", "labeled_statement", "ERROR"},
+    "tsx": {"program", "statement_block", "internal_module", "module",
+            "ambient_declaration", "expression_statement",
+            "if_statement", "else_clause", "try_statement",
+            "catch_clause", "finally_clause", "for_statement",
+            "for_in_statement", "while_statement", "do_statement",
+            "switch_statement", "switch_body", "switch_case",
+            "switch_default", "labeled_statement", "ERROR"},
+    "c_sharp": {"compilation_unit", "namespace_declaration",
+                "file_scoped_namespace_declaration", "declaration_list",
+                "global_statement", "global_attribute_list", "ERROR"},
+    # type_definition/declaration wrap named struct_specifiers
+    # (typedef struct Foo {...} Foo_t; / struct Foo {...} x;)
+    "c": {"translation_unit", "preproc_if", "preproc_ifdef", "preproc_else",
+          "linkage_specification", "declaration_list", "type_definition",
+          "declaration", "ERROR"},
+    "cpp": {"translation_unit", "preproc_if", "preproc_ifdef", "preproc_else",
+            "linkage_specification", "namespace_definition", "declaration_list",
+            "template_declaration", "type_definition", "declaration", "ERROR"},
+    # expression_statement stays: Python module-level assignments live there;
+    # compound-statement bodies (if/try/with/loops/match) stay for
+    # TYPE_CHECKING guards, fallback imports, and conditional definitions
+    "python": {"module", "expression_statement", "if_statement", "try_statement",
+               "except_clause", "else_clause", "finally_clause", "block",
+               "with_statement", "for_statement", "while_statement",
+               "match_statement", "case_clause",
+               "decorated_definition", "ERROR"},
+    "sql": {"source_file", "statement", "ERROR"},
+}
+
 # Mapping from tree-sitter node types to our symbol types
 NODE_TYPE_MAP = {
     "function_declaration": "function", "function_definition": "function",
@@ -126,9 +204,79 @@ HINT_DECORATOR_PATTERNS = {
     },
 }
 
+# Flattened, pre-lowercased views of the pattern sets for the hint hot
+# path: one .lower() per callee instead of one per pattern per callee.
+_DATA_STORE_PATTERNS_LC = tuple(p.lower() for p in HINT_CALLEE_PATTERNS["data_store_access"])
+_FRAMEWORK_MAGIC_PATTERNS = tuple(HINT_DECORATOR_PATTERNS["framework_magic"])
+_REFLECTION_PATTERNS = ("getattr", "setattr", "Reflect.", "eval(", "getPrototypeOf",
+                        "GetType()", ".GetMethod(", "Activator.CreateInstance")
+
+
+def _compile_matcher(patterns):
+    """Build a predicate testing whether any pattern occurs in a string.
+
+    With pyahocorasick installed, one automaton scan classifies the text
+    against every pattern in a single C-level pass. Otherwise a
+    precompiled regex alternation does the same in one sre scan, which
+    still beats N independent substring searches.
+    """
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for p in patterns:
+            automaton.add_word(p, True)
+        automaton.make_automaton()
+
+        def match(text, _iter=automaton.iter):
+            for _ in _iter(text):
+                return True
+            return False
+
+        return match
+    search = re.compile("|".join(map(re.escape, patterns))).search
+    return lambda text: search(text) is not None
+
+
+_data_store_match = _compile_matcher(_DATA_STORE_PATTERNS_LC)
+_framework_magic_match = _compile_matcher(_FRAMEWORK_MAGIC_PATTERNS)
+_reflection_match = _compile_matcher(_REFLECTION_PATTERNS)
+
+# Every hint type leaves a byte-level trace in the raw source: subscript
+# and computed-property hints require a "[", and the pattern hints all
+# contain one of the pattern strings. One case-insensitive search on the
+# undecoded bytes therefore decides whether a file can yield any hint at
+# all (case-folding over-matches, which only costs a skipped skip).
+_HINT_PREFILTER_SEARCH = re.compile(
+    b"|".join(
+        re.escape(p.encode())
+        for p in ("[",) + _DATA_STORE_PATTERNS_LC + _FRAMEWORK_MAGIC_PATTERNS + _REFLECTION_PATTERNS
+    ),
+    re.IGNORECASE,
+).search
+
+# Same idea per call expression: the data-store and reflection matchers
+# only fire on callees containing one of these strings, so one
+# case-insensitive scan of the callee's raw byte range rejects the
+# typical self.foo()/print() callee without decoding it.
+_CALLEE_PREFILTER_SEARCH = re.compile(
+    b"|".join(re.escape(p.encode()) for p in _DATA_STORE_PATTERNS_LC + _REFLECTION_PATTERNS),
+    re.IGNORECASE,
+).search
+
 
 # --- Helpers ---
 
+# Raw bytes of the file currently being processed. Set by process_file so
+# byte-probe helpers can slice the buffer without threading it through
+# every extractor signature; each process handles one file at a time.
+_current_source = b""
+
+@functools.lru_cache(maxsize=None)
+def _get_parser(lang):
+    """One parser per language per process; construction involves grammar
+    lookup and allocation that dominates parse time on small files."""
+    return tree_sitter_languages.get_parser(lang)
+
+
 def _text(node):
     """Safely decode node text. CRITICAL: always use node.text, never byte slicing."""
     if node is None:
@@ -170,13 +318,14 @@ def _is_async(node):
     """Check if a function node is async."""
     if node is None:
         return False
-    txt = _text(node)
-    if txt and txt.startswith("async "):
-        return True
+    # Child probe first: it inspects a handful of nodes, while the
+    # fallback is a six-byte slice of the raw source. "async " is ASCII,
+    # so the byte prefix equals the old decoded-text startswith check.
     for child in node.children:
         if child.type == "async":
             return True
-    return False
+    start = node.start_byte
+    return _current_source[start:start + 6] == b"async "
 
 
 def _visibility(node):
@@ -229,149 +378,234 @@ def _return_type(node):
     return None
 
 
-# --- Call extraction ---
+# --- Tree traversal ---
 
-def _extract_calls_from_body(node):
-    """Recursively find all call_expression nodes within a function body."""
-    calls = []
-    _walk_calls(node, calls)
-    return calls
+def _iter_nodes(root):
+    """Yield root and every descendant via the TreeCursor API.
 
+    The cursor advances in C without materializing child lists or paying
+    a Python frame per level, unlike recursive node.children descent.
+    """
+    cursor = root.walk()
+    while True:
+        yield cursor.node
+        if cursor.goto_first_child():
+            continue
+        if cursor.goto_next_sibling():
+            continue
+        while True:
+            if not cursor.goto_parent():
+                return
+            if cursor.goto_next_sibling():
+                break
 
-def _walk_calls(node, calls):
-    if node.type == "call_expression":
-        callee = node.child_by_field_name("function") or (node.children[0] if node.children else None)
-        if callee:
-            name = _text(callee)
-            # Simplify: take last segment for member expressions
-            if name and "." in name:
-                # Keep full qualified name but also note it
-                pass
-            if name:
-                calls.append({"name": name, "line": node.start_point[0] + 1})
-    for child in node.children:
-        _walk_calls(child, calls)
 
+# --- Call and hint collection ---
 
-# --- Connection hint detection ---
+def _collect_calls_and_hints(root, file_path, detect_hints=True):
+    """Single pass over the tree: record every call expression (with its
+    start byte, for later per-body slicing) and every connection hint.
 
-def _detect_hints(node, file_path, source_lines):
-    """Detect connection hints from a node."""
+    Returns (call_starts, call_records, hints). call_starts is sorted
+    because preorder traversal yields nodes in source order. Callers
+    that know the file cannot match any hint pattern pass
+    detect_hints=False to drop the per-node hint work.
+    """
+    call_starts = []
+    call_records = []
     hints = []
-    _walk_hints(node, file_path, source_lines, hints)
-    return hints
-
+    for n in _iter_nodes(root):
+        if n.type == "call_expression":
+            callee = n.child_by_field_name("function") or (n.children[0] if n.children else None)
+            if callee:
+                name = _text(callee)
+                if name:
+                    call_starts.append(n.start_byte)
+                    call_records.append({"name": name, "line": n.start_point[0] + 1})
+        if detect_hints:
+            _hint_from_node(n, file_path, hints)
+    return call_starts, call_records, hints
+
+
+def _calls_in_span(call_index, start_byte, end_byte):
+    """Calls whose start byte falls inside [start_byte, end_byte)."""
+    call_starts, call_records = call_index
+    lo = bisect_left(call_starts, start_byte)
+    hi = bisect_left(call_starts, end_byte)
+    return call_records[lo:hi]
+
+
+def _hint_from_node(node, file_path, hints):
+    ntype = node.type
 
-def _walk_hints(node, file_path, source_lines, hints):
-    # Dynamic property access: obj[variable]()
-    if node.type == "subscript_expression" or node.type == "computed_property_name":
+    # Dynamic property access obj[variable]() vs. string dispatch handlers["key"]
+    if ntype == "subscript_expression" or ntype == "computed_property_name":
+        txt = _text(node)
         parent = node.parent
-        if parent and parent.type == "call_expression":
-            hints.append({
-                "hint_type": "dynamic_call",
-                "file": file_path,
-                "line": node.start_point[0] + 1,
-                "text": _text(node)[:120] if _text(node) else None,
-            })
-        else:
-            # String dispatch: handlers["key"]
-            hints.append({
-                "hint_type": "string_key_dispatch",
-                "file": file_path,
-                "line": node.start_point[0] + 1,
-                "text": _text(node)[:120] if _text(node) else None,
-            })
+        hints.append({
+            "hint_type": "dynamic_call" if parent and parent.type == "call_expression"
+            else "string_key_dispatch",
+            "file": file_path,
+            "line": node.start_point[0] + 1,
+            "text": txt[:120] if txt else None,
+        })
 
     # Reflection patterns
-    if node.type == "call_expression":
+    if ntype == "call_expression":
         callee = node.child_by_field_name("function") or (node.children[0] if node.children else None)
-        if callee:
+        # Byte-range prefilter: a miss here can never drop a hint because
+        # the case-insensitive byte patterns are a superset of both exact
+        # matchers below (patterns are pure ASCII, which UTF-8 multibyte
+        # sequences cannot alias)
+        if callee is not None and _CALLEE_PREFILTER_SEARCH(
+            _current_source, callee.start_byte, callee.end_byte
+        ):
             cname = _text(callee) or ""
             # Data store access
-            for pattern in HINT_CALLEE_PATTERNS.get("data_store_access", set()):
-                if pattern.lower() in cname.lower():
-                    hints.append({
-                        "hint_type": "data_store_access",
-                        "file": file_path,
-                        "line": node.start_point[0] + 1,
-                        "text": cname[:120],
-                    })
-                    break
-            # Reflection
-            if any(r in cname for r in ("getattr", "setattr", "Reflect.", "eval(", "getPrototypeOf",
-                                         "GetType()", ".GetMethod(", "Activator.CreateInstance")):
+            if _data_store_match(cname.lower()):
                 hints.append({
-                    "hint_type": "reflection",
+                    "hint_type": "data_store_access",
                     "file": file_path,
                     "line": node.start_point[0] + 1,
                     "text": cname[:120],
                 })
-
-    # Decorators / attributes
-    if node.type in ("decorator", "attribute"):
-        dec_text = _text(node) or ""
-        for pattern in HINT_DECORATOR_PATTERNS.get("framework_magic", set()):
-            if pattern in dec_text:
+            # Reflection
+            if _reflection_match(cname):
                 hints.append({
-                    "hint_type": "framework_magic",
+                    "hint_type": "reflection",
                     "file": file_path,
                     "line": node.start_point[0] + 1,
-                    "text": dec_text[:120],
+                    "text": cname[:120],
                 })
-                break
 
-    for child in node.children:
-        _walk_hints(child, file_path, source_lines, hints)
+    # Decorators / attributes
+    if ntype in ("decorator", "attribute"):
+        dec_text = _text(node) or ""
+        if _framework_magic_match(dec_text):
+            hints.append({
+                "hint_type": "framework_magic",
+                "file": file_path,
+                "line": node.start_point[0] + 1,
+                "text": dec_text[:120],
+            })
 
 
 # --- Main extraction per node ---
 
-def _extract_symbol(node, lang, rel_path, source_lines, parent_name=None):
-    """Extract a symbol dict from a tree-sitter node. Returns symbol dict or None."""
-    ntype = node.type
-    sym_type = NODE_TYPE_MAP.get(ntype)
-    if sym_type is None:
-        return None
+def _extract_symbol(node, lang, rel_path, parent_name=None, call_index=None):
+    """Extract a symbol dict from a tree-sitter node. Returns symbol dict or None.
 
-    # Skip call expressions at top level — we extract calls within function bodies
-    if sym_type == "call":
+    Dispatches to a per-node-type handler via _NODE_HANDLERS so each
+    candidate node pays one dict lookup instead of a chain of string
+    comparisons, and each handler only probes the fields its node shape
+    can actually have.
+    """
+    handler = _NODE_HANDLERS.get(node.type)
+    if handler is None:
         return None
+    return handler(node, lang, rel_path, parent_name, call_index)
+
+
+def _symbol_shell(node, sym_type, name, parent_name, rel_path):
+    """Fields common to every symbol dict."""
+    return {
+        "type": sym_type,
+        "name": name,
+        "qualified_name": f"{parent_name}.{name}" if parent_name else name,
+        "file": rel_path,
+        "line_start": node.start_point[0] + 1,
+        "line_end": node.end_point[0] + 1,
+    }
 
-    # Skip exports — we handle export info on the child
-    if sym_type == "export":
-        return None
 
+def _apply_export(symbol, node):
+    """Tag a symbol whose direct parent is an export_statement."""
+    parent = node.parent
+    if parent and parent.type == "export_statement":
+        parent_text = _text(parent) or ""
+        symbol["exports"] = ["default"] if "default" in parent_text[:30] else ["named"]
+
+
+def _fill_function(symbol, node, func_node, call_index):
+    """Signature, async flag, visibility, and body calls for a function-like
+    symbol. func_node differs from node for promoted arrow functions."""
+    symbol["signature"] = {
+        "params": _extract_params(func_node),
+        "return_type": _return_type(func_node),
+    }
+    symbol["is_async"] = _is_async(func_node)
+    vis = _visibility(node)
+    if vis:
+        symbol["visibility"] = vis
+    # Slice this body's calls out of the pre-collected, byte-sorted list
+    body = func_node.child_by_field_name("body") or _child_by_type(func_node, "statement_block") or _child_by_type(func_node, "block")
+    if body:
+        symbol["calls"] = _calls_in_span(call_index, body.start_byte, body.end_byte) if call_index else []
+
+
+def _handle_decorated(node, lang, rel_path, parent_name, call_index):
     # Decorated definitions: extract the inner definition
-    if sym_type == "decorated":
-        for child in node.children:
-            if child.type in ("function_definition", "class_definition", "function_declaration",
-                              "class_declaration", "method_definition"):
-                sym = _extract_symbol(child, lang, rel_path, source_lines, parent_name)
-                if sym:
-                    # Collect decorator names
-                    decorators = []
-                    for dec in _children_by_type(node, "decorator"):
-                        decorators.append(_text(dec))
-                    sym["decorators"] = decorators
-                return sym
-        return None
+    for child in node.children:
+        if child.type in ("function_definition", "class_definition", "function_declaration",
+                          "class_declaration", "method_definition"):
+            sym = _extract_symbol(child, lang, rel_path, parent_name, call_index)
+            if sym:
+                sym["decorators"] = [_text(dec) for dec in _children_by_type(node, "decorator")]
+            return sym
+    return None
+
+
+def _handle_import_node(node, lang, rel_path, parent_name, call_index):
+    return _extract_import(node, rel_path)
 
-    name = _name(node)
 
+def _handle_function(node, lang, rel_path, parent_name, call_index):
+    name = _name(node)
     # For arrow functions assigned to variables: get name from parent variable_declarator
-    if ntype == "arrow_function" and name is None:
+    if name is None and node.type == "arrow_function":
         if node.parent and node.parent.type == "variable_declarator":
             name = _name(node.parent)
+    if not name:
+        return None
+    symbol = _symbol_shell(node, NODE_TYPE_MAP[node.type], name, parent_name, rel_path)
+    _fill_function(symbol, node, node, call_index)
+    _apply_export(symbol, node)
+    return symbol
 
-    # For imports
-    if sym_type == "import":
-        return _extract_import(node, rel_path)
 
-    # If still no name, skip
+def _handle_class(node, lang, rel_path, parent_name, call_index):
+    name = _name(node)
+    if not name:
+        return None
+    symbol = _symbol_shell(node, NODE_TYPE_MAP[node.type], name, parent_name, rel_path)
+    vis = _visibility(node)
+    if vis:
+        symbol["visibility"] = vis
+    superclass = node.child_by_field_name("superclass")
+    if superclass:
+        symbol["extends"] = _text(superclass)
+    # Body members — extract nested symbols
+    body = node.child_by_field_name("body") or _child_by_type(node, "class_body") or _child_by_type(node, "declaration_list") or _child_by_type(node, "enum_body")
+    if body:
+        members = []
+        for child in body.children:
+            child_sym = _extract_symbol(child, lang, rel_path, parent_name=name, call_index=call_index)
+            if child_sym:
+                members.append(child_sym)
+        if members:
+            symbol["members"] = members
+    _apply_export(symbol, node)
+    return symbol
+
+
+def _handle_value(node, lang, rel_path, parent_name, call_index):
+    ntype = node.type
+    name = _name(node)
     if not name:
         return None
 
     # Variable declarator containing arrow_function: promote to function
+    sym_type = NODE_TYPE_MAP[ntype]
     arrow_child = None
     if ntype == "variable_declarator":
         value_node = node.child_by_field_name("value")
@@ -386,76 +620,49 @@ def _extract_symbol(node, lang, rel_path, source_lines, parent_name=None):
         left = node.child_by_field_name("left")
         name = _text(left) if left else name
 
-    qualified_name = f"{parent_name}.{name}" if parent_name else name
-    line_start = node.start_point[0] + 1
-    line_end = node.end_point[0] + 1
-
-    symbol = {
-        "type": sym_type,
-        "name": name,
-        "qualified_name": qualified_name,
-        "file": rel_path,
-        "line_start": line_start,
-        "line_end": line_end,
-    }
-
-    # Functions / methods (including promoted arrow functions)
-    if sym_type in ("function", "method"):
-        func_node = arrow_child if arrow_child else node
-        symbol["signature"] = {
-            "params": _extract_params(func_node),
-            "return_type": _return_type(func_node),
-        }
-        symbol["is_async"] = _is_async(func_node)
-        vis = _visibility(node)
-        if vis:
-            symbol["visibility"] = vis
-
-        # Extract calls from body
-        body = func_node.child_by_field_name("body") or _child_by_type(func_node, "statement_block") or _child_by_type(func_node, "block")
-        if body:
-            symbol["calls"] = _extract_calls_from_body(body)
-
-    # Classes / structs / interfaces / enums
-    elif sym_type in ("class", "struct", "interface", "enum"):
-        vis = _visibility(node)
-        if vis:
-            symbol["visibility"] = vis
-        # Extends / implements
-        superclass = node.child_by_field_name("superclass")
-        if superclass:
-            symbol["extends"] = _text(superclass)
-        # Body members — extract nested symbols
-        body = node.child_by_field_name("body") or _child_by_type(node, "class_body") or _child_by_type(node, "declaration_list") or _child_by_type(node, "enum_body")
-        if body:
-            members = []
-            for child in body.children:
-                child_sym = _extract_symbol(child, lang, rel_path, source_lines, parent_name=name)
-                if child_sym:
-                    members.append(child_sym)
-            if members:
-                symbol["members"] = members
-
-    # Variables / properties / fields
-    elif sym_type in ("variable", "property", "field", "constant"):
+    symbol = _symbol_shell(node, sym_type, name, parent_name, rel_path)
+    if arrow_child is not None:
+        _fill_function(symbol, node, arrow_child, call_index)
+    else:
         type_ann = node.child_by_field_name("type")
         if type_ann:
             symbol["value_type"] = _text(type_ann)
+    _apply_export(symbol, node)
+    return symbol
 
-    # SQL types
-    elif sym_type in ("table", "view", "procedure", "index"):
-        pass  # name and line info is sufficient
 
-    # Export info: check if parent is export_statement
-    if node.parent and node.parent.type == "export_statement":
-        # Check for default
-        parent_text = _text(node.parent) or ""
-        if "default" in parent_text[:30]:
-            symbol["exports"] = ["default"]
+def _handle_plain(node, lang, rel_path, parent_name, call_index):
+    # Decorators, type aliases, and SQL objects: name and lines suffice
+    name = _name(node)
+    if not name:
+        return None
+    symbol = _symbol_shell(node, NODE_TYPE_MAP[node.type], name, parent_name, rel_path)
+    _apply_export(symbol, node)
+    return symbol
+
+
+def _build_node_handlers():
+    handlers = {}
+    for ntype, sym_type in NODE_TYPE_MAP.items():
+        if sym_type in ("call", "export"):
+            # Calls are collected by the fused pass; exports tag their children
+            continue
+        if sym_type == "decorated":
+            handlers[ntype] = _handle_decorated
+        elif sym_type == "import":
+            handlers[ntype] = _handle_import_node
+        elif sym_type in ("function", "method"):
+            handlers[ntype] = _handle_function
+        elif sym_type in ("class", "struct", "interface", "enum"):
+            handlers[ntype] = _handle_class
+        elif sym_type in ("variable", "property", "field", "constant"):
+            handlers[ntype] = _handle_value
         else:
-            symbol["exports"] = ["named"]
+            handlers[ntype] = _handle_plain
+    return handlers
 
-    return symbol
+
+_NODE_HANDLERS = _build_node_handlers()
 
 
 def _extract_import(node, rel_path):
@@ -475,40 +682,98 @@ def _extract_import(node, rel_path):
         full = _text(node) or ""
         sym["source"] = full.strip()
 
-    # Try to extract imported names
+    # Collect imported names in one cursor scan instead of three nested
+    # .children loops (each of which materializes a wrapper list). The
+    # parent-type checks reproduce the old nesting exactly: default
+    # imports and named specifiers under import_clause, dotted_name and
+    # bare specifiers directly under the import node.
     names = []
-    for child in node.children:
-        if child.type == "import_clause":
-            for sub in child.children:
-                if sub.type == "identifier":
-                    names.append(_text(sub))
-                elif sub.type in ("named_imports", "import_specifier"):
-                    for spec in sub.children:
-                        if spec.type == "import_specifier":
-                            n = _name(spec)
-                            if n:
-                                names.append(n)
-                        elif spec.type == "identifier":
-                            names.append(_text(spec))
-        elif child.type == "dotted_name":
-            names.append(_text(child))
-        elif child.type == "import_specifier":
-            n = _name(child)
-            if n:
-                names.append(n)
+    for n in _iter_nodes(node):
+        parent = n.parent
+        if parent is None:
+            continue
+        ptype = parent.type
+        ntype = n.type
+        if ntype == "identifier":
+            if ptype == "import_clause" or (
+                ptype in ("named_imports", "import_specifier")
+                and parent.parent is not None
+                and parent.parent.type == "import_clause"
+            ):
+                names.append(_text(n))
+        elif ntype == "import_specifier":
+            if ptype in ("named_imports", "import_specifier"):
+                if parent.parent is not None and parent.parent.type == "import_clause":
+                    spec_name = _name(n)
+                    if spec_name:
+                        names.append(spec_name)
+            # Node wrappers are constructed fresh on every .parent
+            # access, so "directly under the import node" must compare
+            # with ==, never identity
+            elif parent == node:
+                spec_name = _name(n)
+                if spec_name:
+                    names.append(spec_name)
+        elif ntype == "dotted_name" and parent == node:
+            names.append(_text(n))
     if names:
         sym["names"] = names
 
-    # Set name to source for consistency
-    sym["name"] = sym.get("source", _text(node)[:80] if _text(node) else "unknown")
+    # Set name to source for consistency (both branches above set it)
+    sym["name"] = sym["source"]
 
     return sym
 
 
+# --- Extraction cache ---
+
+_CACHE_FORMAT = 1
+
+
+def _load_cache(path):
+    """Load the on-disk extraction cache; any failure means a cold start."""
+    try:
+        with open(path, "rb") as f:
+            cache = pickle.load(f)
+    except (OSError, EOFError, pickle.PickleError, AttributeError):
+        return {}
+    if cache.get("format") != _CACHE_FORMAT:
+        return {}
+    return cache
+
+
+def _save_cache(path, cache):
+    """Persist the extraction cache atomically; failures are non-fatal."""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp.{os.getpid()}"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(cache, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
 # --- File processing ---
 
+def _process_entry(entry_args):
+    """Pool worker: parse and validate one file. Takes (path, lang,
+    repo_root) strings so the payload pickles cheaply; validation runs
+    here, against the lines process_file already split, so neither the
+    source text nor a second read crosses back to the driver. Returns
+    (symbols, hints, validation_errors, error_msg)."""
+    fpath, lang, repo_root = entry_args
+    symbols, hints, source_lines, error = process_file(fpath, repo_root, lang_override=lang)
+    if error:
+        return [], [], [], error
+    val_errors = []
+    if symbols:
+        val_errors = _validate_file_symbols(symbols[0]["file"], symbols, source_lines)
+    return symbols, hints, val_errors, None
+
+
 def process_file(file_path, repo_root, lang_override=None):
-    """Parse a single file and return (symbols, hints, error_msg)."""
+    """Parse a single file and return (symbols, hints, source_lines, error_msg)."""
     file_path = Path(file_path).resolve()
     repo_root = Path(repo_root).resolve()
 
@@ -520,28 +785,40 @@ def process_file(file_path, repo_root, lang_override=None):
     ext = file_path.suffix.lower()
     lang = lang_override or EXTENSION_TO_LANG.get(ext)
     if not lang:
-        return [], [], f"No language mapping for extension '{ext}'"
+        return [], [], [], f"No language mapping for extension '{ext}'"
 
     try:
-        parser = tree_sitter_languages.get_parser(lang)
+        parser = _get_parser(lang)
     except Exception as e:
-        return [], [], f"Grammar not available for '{lang}': {e}"
+        return [], [], [], f"Grammar not available for '{lang}': {e}"
 
     try:
         source_bytes = file_path.read_bytes()
     except Exception as e:
-        return [], [], f"Cannot read file: {e}"
+        return [], [], [], f"Cannot read file: {e}"
+
+    global _current_source
+    _current_source = source_bytes
 
     try:
         tree = parser.parse(source_bytes)
     except Exception as e:
-        return [], [], f"Parse error: {e}"
+        return [], [], [], f"Parse error: {e}"
 
-    source_text = source_bytes.decode("utf-8", errors="replace")
-    source_lines = source_text.splitlines()
+    source_lines = source_bytes.decode("utf-8", errors="replace").splitlines()
+
+    # One pass over the full tree collects every call and hint up front;
+    # the symbol walk below never descends into function bodies, so each
+    # body node is now visited exactly once instead of two or three times.
+    # Files whose raw bytes cannot produce a hint skip that half outright.
+    detect_hints = _HINT_PREFILTER_SEARCH(source_bytes) is not None
+    call_starts, call_records, hints = _collect_calls_and_hints(
+        tree.root_node, rel_path, detect_hints=detect_hints)
+    call_index = (call_starts, call_records)
 
     symbols = []
     symbol_types = LANG_SYMBOL_TYPES.get(lang, set())
+    container_types = LANG_CONTAINER_TYPES.get(lang)
 
     # Node types that define a function scope — don't recurse into these for
     # top-level symbol discovery (calls are extracted separately by _extract_symbol)
@@ -569,7 +846,7 @@ def process_file(file_path, repo_root, lang_override=None):
 
         # Process symbol-type nodes
         if ntype in symbol_types:
-            sym = _extract_symbol(node, lang, rel_path, source_lines, parent_name=parent_class_name)
+            sym = _extract_symbol(node, lang, rel_path, parent_name=parent_class_name, call_index=call_index)
             if sym:
                 if export_tag:
                     sym["exports"] = export_tag
@@ -582,21 +859,37 @@ def process_file(file_path, repo_root, lang_override=None):
         if ntype in FUNCTION_SCOPE_TYPES:
             return
 
+        # Only containers can hold further top-level symbols
+        if container_types is not None and ntype not in container_types:
+            return
+
         for child in node.children:
             walk(child, parent_class_name, export_tag=export_tag)
 
     walk(tree.root_node)
 
-    # Extract hints from the whole tree
-    hints = _detect_hints(tree.root_node, rel_path, source_lines)
+    # Drop the buffer reference once extraction is done: validation only
+    # needs source_lines, and a lingering global would otherwise pin the
+    # previous file's bytes in each worker between tasks.
+    _current_source = b""
 
-    return symbols, hints, None
+    return symbols, hints, source_lines, None
 
 
 # --- Validation ---
 
-def validate_symbols(symbols, repo_root):
-    """Validate that each symbol name appears on its source line. Returns (passed, errors)."""
+# Identifier shape shared by line tokenization and the "is this name a
+# plain identifier" test; '#' covers JS/TS private members.
+_TOKEN_RE = re.compile(r"[A-Za-z_#][A-Za-z0-9_]*")
+
+def validate_symbols(symbols, repo_root, source_lines_by_file=None):
+    """Validate that each symbol name appears on its source line. Returns (passed, errors).
+
+    This is the --validate-only entry point: symbols from a whole JSONL
+    file are grouped by source file, which is then read from disk unless
+    its lines are preloaded in source_lines_by_file. The per-file hot
+    path used by the workers calls _validate_file_symbols directly.
+    """
     errors = []
     repo_root = Path(repo_root).resolve()
 
@@ -607,47 +900,64 @@ def validate_symbols(symbols, repo_root):
         by_file.setdefault(f, []).append(sym)
 
     for rel_file, file_syms in by_file.items():
-        full_path = repo_root / rel_file
-        try:
-            source_lines = full_path.read_text(encoding="utf-8", errors="replace").splitlines()
-        except Exception as e:
-            errors.append(f"{rel_file}: cannot read for validation: {e}")
-            continue
-
-        for sym in file_syms:
-            if sym["type"] == "import":
-                continue  # imports don't always have a name on the line
-            name = sym.get("name")
-            if not name:
+        source_lines = (source_lines_by_file or {}).get(rel_file)
+        if source_lines is None:
+            full_path = repo_root / rel_file
+            try:
+                source_lines = full_path.read_text(encoding="utf-8", errors="replace").splitlines()
+            except Exception as e:
+                errors.append(f"{rel_file}: cannot read for validation: {e}")
                 continue
-            line_idx = sym.get("line_start", 0) - 1
-            if line_idx < 0 or line_idx >= len(source_lines):
-                errors.append(f"{rel_file}:{sym.get('line_start')}: line out of range for symbol '{name}'")
-                continue
-            source_line = source_lines[line_idx]
-            if name not in source_line:
-                # Check a few lines around (some declarations span lines)
-                found = False
-                for offset in range(-2, 3):
-                    idx = line_idx + offset
-                    if 0 <= idx < len(source_lines) and name in source_lines[idx]:
-                        found = True
-                        break
-                if not found:
-                    errors.append(
-                        f"{rel_file}:{sym.get('line_start')}: symbol '{name}' not found on source line: "
-                        f"'{source_line.strip()[:80]}'"
-                    )
-            # Case corruption check
-            elif name and source_line and name[0].islower():
-                # Check if source actually starts uppercase
-                idx = source_line.find(name)
-                if idx >= 0:
-                    pass  # found as-is, OK
+
+        errors.extend(_validate_file_symbols(rel_file, file_syms, source_lines))
 
     return len(errors) == 0, errors
 
 
+def _validate_file_symbols(rel_file, file_syms, source_lines):
+    """Validate one file's symbols against its already-split lines."""
+    errors = []
+
+    # Lazily tokenize lines: symbols cluster, so each touched line is
+    # split into an identifier set once and every lookup after that
+    # is O(1) instead of a substring scan per symbol.
+    token_cache = {}
+
+    def tokens_at(idx):
+        toks = token_cache.get(idx)
+        if toks is None:
+            toks = token_cache[idx] = set(_TOKEN_RE.findall(source_lines[idx]))
+        return toks
+
+    n_lines = len(source_lines)
+    for sym in file_syms:
+        if sym["type"] == "import":
+            continue  # imports don't always have a name on the line
+        name = sym.get("name")
+        if not name:
+            continue
+        line_idx = sym.get("line_start", 0) - 1
+        if line_idx < 0 or line_idx >= n_lines:
+            errors.append(f"{rel_file}:{sym.get('line_start')}: line out of range for symbol '{name}'")
+            continue
+        # Check the declaration line, then a few around it (some
+        # declarations span lines)
+        window = range(max(0, line_idx - 2), min(n_lines, line_idx + 3))
+        if _TOKEN_RE.fullmatch(name):
+            found = any(name in tokens_at(idx) for idx in window)
+        else:
+            # Dotted or otherwise non-identifier names keep the
+            # substring check; they never tokenize as one word
+            found = any(name in source_lines[idx] for idx in window)
+        if not found:
+            errors.append(
+                f"{rel_file}:{sym.get('line_start')}: symbol '{name}' not found on source line: "
+                f"'{source_lines[line_idx].strip()[:80]}'"
+            )
+
+    return errors
+
+
 # --- CLI ---
 
 def main():
@@ -657,6 +967,8 @@ def main():
     parser.add_argument("--output", help="Output JSONL file path")
     parser.add_argument("--hints-output", help="Hints output JSONL file path")
     parser.add_argument("--repo-root", help="Repository root for relative path calculation", default=".")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes for extraction (default: CPU count)")
     parser.add_argument("--validate-only", help="Validate an existing JSONL file", metavar="JSONL_FILE")
 
     args = parser.parse_args()
@@ -693,74 +1005,142 @@ def main():
             sys.exit(1)
 
     repo_root = Path(args.repo_root).resolve()
-    all_symbols = []
+    cache_path = str(Path(args.output).parent / ".cache" / "extract-symbols.pickle")
+    cache = _load_cache(cache_path)
+    cached_files = cache.get("files", {})
+    new_cached_files = {}
     all_hints = []
     files_processed = 0
     files_failed = 0
+    symbols_extracted = 0
     total_calls = 0
 
+    # Map language names to tree-sitter names up front so workers get the
+    # resolved name
+    lang_map = {"javascript": "javascript", "typescript": "typescript", "tsx": "tsx",
+                "csharp": "c_sharp", "c_sharp": "c_sharp", "c#": "c_sharp",
+                "c": "c", "cpp": "cpp", "c++": "cpp",
+                "python": "python", "sql": "sql", "mysql": "sql"}
+    # Unchanged files — same (mtime_ns, size) under the same repo root —
+    # are served from the on-disk cache and never reach a worker; their
+    # symbols were validated when first extracted.
+    work_items = []
+    cached_results = {}
+    stat_keys = {}
+    pending_items = []
     for entry in files_to_process:
-        fpath = entry["path"]
         lang = entry.get("language")
-        # Map language names to tree-sitter names
         if lang:
-            lang_map = {"javascript": "javascript", "typescript": "typescript", "tsx": "tsx",
-                        "csharp": "c_sharp", "c_sharp": "c_sharp", "c#": "c_sharp",
-                        "c": "c", "cpp": "cpp", "c++": "cpp",
-                        "python": "python", "sql": "sql", "mysql": "sql"}
             lang = lang_map.get(lang.lower(), lang)
+        item = (entry["path"], lang, str(repo_root))
+        idx = len(work_items)
+        work_items.append(item)
+        try:
+            st = os.stat(entry["path"])
+            stat_key = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stat_key = None
+        stat_keys[idx] = stat_key
+        cache_key = f"{repo_root}::{entry['path']}"
+        cached = cached_files.get(cache_key)
+        if cached is not None and stat_key is not None and cached[0] == stat_key:
+            cached_results[idx] = (cached[1], cached[2], [], None)
+            new_cached_files[cache_key] = cached
+        else:
+            pending_items.append(item)
+
+    # Files are independent and parsing is CPU-bound in the grammar, so
+    # fan out across processes; order is preserved by map. Serial path
+    # covers --jobs 1, tiny batches, and platforms without fork.
+    def _result_stream():
+        if args.jobs > 1 and len(pending_items) > 1:
+            try:
+                ctx = multiprocessing.get_context("fork")
+                executor = ProcessPoolExecutor(
+                    max_workers=min(args.jobs, len(pending_items)), mp_context=ctx,
+                )
+                results = executor.map(_process_entry, pending_items, chunksize=16)
+            except (OSError, ValueError):
+                results = None
+            if results is not None:
+                with executor:
+                    yield from results
+                return
+        for item in pending_items:
+            yield _process_entry(item)
+
+    def _merged_results():
+        """Interleave cache hits with fresh worker results, preserving
+        work_items order; fresh successes are added to the next cache."""
+        fresh = _result_stream()
+        for idx, (fpath, _lang, _root) in enumerate(work_items):
+            result = cached_results.get(idx)
+            if result is None:
+                result = next(fresh)
+                symbols, hints, val_errors, error = result
+                if error is None and not val_errors and stat_keys[idx] is not None:
+                    new_cached_files[f"{repo_root}::{fpath}"] = (stat_keys[idx], symbols, hints)
+            yield result
+
+    # Write symbols as their files complete: workers parse, the driver
+    # encodes and appends, so the full symbol set never sits in memory.
+    # Encoded lines are joined and written in batches so the write cost
+    # is one Python call per ~1024 records rather than one per record.
+    flush_every = 1024
+    buf = []
+    with open(args.output, "wb", buffering=1024 * 1024) as out:
+        for (fpath, _lang, _root), (symbols, hints, val_errors, error) in zip(
+            work_items, _merged_results()
+        ):
+            if error:
+                log.warning(f"Skipping {fpath}: {error}")
+                files_failed += 1
+                continue
 
-        symbols, hints, error = process_file(fpath, repo_root, lang_override=lang)
-
-        if error:
-            log.warning(f"Skipping {fpath}: {error}")
-            files_failed += 1
-            continue
-
-        # Validate symbols for this file
-        passed, val_errors = validate_symbols(symbols, repo_root)
-        if not passed:
-            for ve in val_errors:
-                log.error(f"VALIDATION FAILED: {ve}")
-            log.error(f"File {fpath} failed validation — writing ZERO symbols")
-            files_failed += 1
-            continue
-
-        # Count calls (including nested members)
-        for sym in symbols:
-            total_calls += len(sym.get("calls", []))
-            for member in sym.get("members", []):
-                total_calls += len(member.get("calls", []))
+            # Workers validated against their own in-memory source lines
+            if val_errors:
+                for ve in val_errors:
+                    log.error(f"VALIDATION FAILED: {ve}")
+                log.error(f"File {fpath} failed validation — writing ZERO symbols")
+                files_failed += 1
+                continue
 
-        all_symbols.extend(symbols)
-        all_hints.extend(hints)
-        files_processed += 1
+            # Count calls (including nested members)
+            for sym in symbols:
+                total_calls += len(sym.get("calls", []))
+                for member in sym.get("members", []):
+                    total_calls += len(member.get("calls", []))
+                buf.append(_dump_line(sym))
+            if len(buf) >= flush_every:
+                out.write(b"".join(buf))
+                buf.clear()
 
-    # Write output
-    with open(args.output, "w") as out:
-        for sym in all_symbols:
-            out.write(json.dumps(sym, ensure_ascii=False) + "\n")
+            symbols_extracted += len(symbols)
+            all_hints.extend(hints)
+            files_processed += 1
 
         # Summary
         summary = {
             "type": "summary",
             "files_processed": files_processed,
             "files_failed": files_failed,
-            "symbols_extracted": len(all_symbols),
+            "symbols_extracted": symbols_extracted,
             "calls_extracted": total_calls,
             "hints_flagged": len(all_hints),
             "validation_passed": files_failed == 0,
         }
-        out.write(json.dumps(summary, ensure_ascii=False) + "\n")
+        buf.append(_dump_line(summary))
+        out.write(b"".join(buf))
+
+    _save_cache(cache_path, {"format": _CACHE_FORMAT, "files": new_cached_files})
 
-    log.info(f"Wrote {len(all_symbols)} symbols to {args.output}")
+    log.info(f"Wrote {symbols_extracted} symbols to {args.output}")
     log.info(f"Summary: {json.dumps(summary)}")
 
     # Write hints
     if args.hints_output and all_hints:
-        with open(args.hints_output, "w") as hf:
-            for hint in all_hints:
-                hf.write(json.dumps(hint, ensure_ascii=False) + "\n")
+        with open(args.hints_output, "wb") as hf:
+            hf.write(b"".join(map(_dump_line, all_hints)))
         log.info(f"Wrote {len(all_hints)} hints to {args.hints_output}")
 
     if files_failed > 0:
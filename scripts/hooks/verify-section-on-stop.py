@@ -15,32 +15,186 @@ writes files to disk itself. This hook is a verification/safety net.
 from __future__ import annotations
 
 import json
+import mmap
 import os
 import re
 import sys
 import time
-from datetime import datetime
-from pathlib import Path
 
-# Debug log file
-DEBUG_LOG = Path.home() / ".claude" / "fi-verify-section-debug.log"
-
-
-def debug_log(msg: str) -> None:
-    """Append debug message to log file."""
-    if not os.environ.get("DEBUG_FI_SECTION_HOOK"):
-        return
+try:
+    from orjson import loads as _jloads
+except ImportError:  # optional accelerator; stdlib parser is the fallback
+    _jloads = json.loads
+
+# Matches the old two-step test exactly: "section-" occurs somewhere and
+# the path ends with ".md" (a "section-" occurrence can never straddle
+# the ".md" suffix, so ordering them is equivalent). Compiled once; one
+# search call replaces two string-method dispatches per Write block.
+SECTION_MD_RE = re.compile(r"(?s)section-.*\.md\Z")
+
+# Structure markers a section file must contain, as bytes — every check
+# on the content is a pure byte-level test, so the file is never decoded.
+# All markers are found in a single scan instead of one full pass per
+# marker: an Aho-Corasick automaton when a bytes-mode pyahocorasick is
+# installed, otherwise one precompiled alternation.
+REQUIRED_SECTIONS = (
+    b"## Context",
+    b"## What to Build",
+    b"## Tests to Write First",
+    b"## Acceptance Criteria",
+)
+_CHECKBOX_MARKER = b"- [ ]"
+_SCAN_NEEDLES = REQUIRED_SECTIONS + (_CHECKBOX_MARKER,)
+
+# Validation only needs the prologue of the file; past this many bytes
+# nothing else is inspected, and a file this big is a bug, not a section
+_VALIDATION_READ_CAP = 256 * 1024
+_MAX_SECTION_BYTES = 5_000_000
+
+# The hook output envelope is fixed shape; only additionalContext
+# varies. Formatting into this template (json.dumps escapes just the
+# context string) emits the same bytes as encoding the full dict.
+_OUTPUT_TMPL = (
+    '{{"hookSpecificOutput": {{"hookEventName": "SubagentStop", '
+    '"additionalContext": {ctx}}}}}'
+)
+
+# The common pyahocorasick wheel is compiled for unicode words only;
+# bytes mode is required here, anything else uses the regex scan
+_NEEDLE_AUTOMATON = None
+try:
+    import ahocorasick
+    if not getattr(ahocorasick, "unicode", True):
+        _NEEDLE_AUTOMATON = ahocorasick.Automaton()
+        for _needle in _SCAN_NEEDLES:
+            _NEEDLE_AUTOMATON.add_word(_needle, _needle)
+        _NEEDLE_AUTOMATON.make_automaton()
+except ImportError:
+    pass
+
+if _NEEDLE_AUTOMATON is not None:
+    def _find_needles(content: bytes) -> set[bytes]:
+        return {needle for _, needle in _NEEDLE_AUTOMATON.iter(content)}
+else:
+    _NEEDLE_RE = re.compile(b"|".join(re.escape(n) for n in _SCAN_NEEDLES))
+
+    def _find_needles(content: bytes) -> set[bytes]:
+        return set(_NEEDLE_RE.findall(content))
+
+
+# The debug flag cannot change mid-run, so bind the right debug_log at
+# import: disabled runs get an empty function instead of re-checking the
+# environment on every call, and enabled runs create the log directory
+# exactly once here. atexit and pathlib are debug-only costs — the
+# normal path never imports them.
+if os.environ.get("DEBUG_FI_SECTION_HOOK"):
+    import atexit
+    from pathlib import Path
+
+    DEBUG_LOG = Path.home() / ".claude" / "fi-verify-section-debug.log"
     try:
         DEBUG_LOG.parent.mkdir(parents=True, exist_ok=True)
-        with open(DEBUG_LOG, "a") as f:
-            f.write(f"{datetime.now().isoformat()} {msg}\n")
     except OSError:
         pass
 
+    # Messages are buffered in-process and flushed as one append at
+    # exit: one open/write/close for the whole invocation instead of
+    # three syscalls per call, and concurrent hooks interleave whole
+    # invocations in the log rather than individual lines
+    _LOG_BUF: list[str] = []
+
+    @atexit.register
+    def _flush_log() -> None:
+        if not _LOG_BUF:
+            return
+        try:
+            with open(DEBUG_LOG, "a") as f:
+                f.write("".join(_LOG_BUF))
+        except OSError:
+            pass
+        _LOG_BUF.clear()
+
+    def debug_log(msg: str) -> None:
+        """Buffer debug message, stamped with epoch seconds."""
+        now_ns = time.time_ns()
+        _LOG_BUF.append(f"{now_ns // 1_000_000_000}.{now_ns % 1_000_000_000:09d} {msg}\n")
+else:
+    def debug_log(msg: str) -> None:
+        """Debug logging disabled."""
+        return
+
+
+# How long a file must stay untouched to count as fully written
+_STABILITY_MS = 200
+
+# inotify event masks (linux/inotify.h)
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+
+
+def _wait_inotify(
+    path: str,
+    stability_ms: int = _STABILITY_MS,
+    timeout_s: float = 5.0,
+) -> bool | None:
+    """Event-driven wait: watch the file's directory with inotify and
+    return once no write activity has touched it for stability_ms.
+
+    Returns True/False like wait_for_stable_file, or None when inotify
+    is unavailable (non-Linux, libc without the symbols, watch failure)
+    so the caller can fall back to the stat poll.
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    import ctypes
+    import select
+    import struct
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        inotify_init1 = libc.inotify_init1
+        inotify_add_watch = libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+
+    fd = inotify_init1(os.O_NONBLOCK)
+    if fd < 0:
+        return None
+    try:
+        watch_dir = os.path.dirname(path) or "."
+        mask = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO
+        if inotify_add_watch(fd, os.fsencode(watch_dir), mask) < 0:
+            return None
+
+        target = os.fsencode(os.path.basename(path))
+        deadline = time.time() + timeout_s
+        last_activity = time.time()
+        while True:
+            now = time.time()
+            if now >= deadline:
+                return False
+            ready, _, _ = select.select([fd], [], [], min(stability_ms / 1000, deadline - now))
+            if ready:
+                try:
+                    buf = os.read(fd, 65536)
+                except OSError:
+                    return None
+                # struct inotify_event: wd, mask, cookie, len, name[len]
+                pos = 0
+                while pos + 16 <= len(buf):
+                    _wd, _ev_mask, _cookie, name_len = struct.unpack_from("iIII", buf, pos)
+                    if buf[pos + 16:pos + 16 + name_len].rstrip(b"\x00") == target:
+                        last_activity = time.time()
+                    pos += 16 + name_len
+            if (time.time() - last_activity) >= stability_ms / 1000 and os.path.exists(path):
+                return True
+    finally:
+        os.close(fd)
+
 
 def wait_for_stable_file(
     path: str,
-    stability_ms: int = 200,
+    stability_ms: int = _STABILITY_MS,
     timeout_s: float = 5.0,
     poll_ms: int = 50,
 ) -> bool:
@@ -49,90 +203,207 @@ def wait_for_stable_file(
     Returns True if file is stable, False if timeout or missing.
     """
     deadline = time.time() + timeout_s
-    last_size = -1
+    last_marker = None
     stable_since = time.time()
 
-    while time.time() < deadline:
-        try:
-            size = os.path.getsize(path)
-        except OSError:
+    # Open once and fstat the fd each poll: no pathname resolution per
+    # iteration, and transcripts are append-only so the inode never
+    # changes under us. The open retries inside the loop in case the
+    # hook fired before the file existed.
+    fd = -1
+    try:
+        while time.time() < deadline:
+            if fd < 0:
+                try:
+                    fd = os.open(path, os.O_RDONLY)
+                except OSError:
+                    time.sleep(poll_ms / 1000)
+                    continue
+
+            # One fstat per poll covers both size and mtime; either
+            # changing restarts the stability window
+            st = os.fstat(fd)
+            marker = (st.st_size, st.st_mtime_ns)
+            if marker != last_marker:
+                last_marker = marker
+                stable_since = time.time()
+            elif (time.time() - stable_since) >= stability_ms / 1000:
+                return True
+
             time.sleep(poll_ms / 1000)
-            continue
 
-        if size != last_size:
-            last_size = size
-            stable_since = time.time()
-        elif (time.time() - stable_since) >= stability_ms / 1000:
-            return True
+        return False
+    finally:
+        if fd >= 0:
+            os.close(fd)
+
 
-        time.sleep(poll_ms / 1000)
+# Scan results persist across hook processes: several section writers
+# stopping in a burst means several invocations walking overlapping
+# transcripts, so each successful scan records (transcript size, found
+# path) keyed by transcript path. A later invocation with an unchanged
+# transcript skips the scan outright; a grown transcript scans only the
+# appended suffix.
+_SECTION_CACHE_PATH = os.path.join(
+    os.path.expanduser("~"), ".claude", "fi-section-cache.json"
+)
 
-    return False
+# Entries for transcripts that no longer exist are evicted on save, and
+# the cache is capped (oldest-first) so it cannot grow without bound
+# across sessions
+_SCAN_CACHE_MAX = 64
+
+
+def _load_scan_cache() -> dict:
+    try:
+        with open(_SECTION_CACHE_PATH, "rb") as f:
+            cache = _jloads(f.read())
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_scan_cache(cache: dict) -> None:
+    for dead in [p for p in cache if not os.path.exists(p)]:
+        del cache[dead]
+    while len(cache) > _SCAN_CACHE_MAX:
+        del cache[next(iter(cache))]
+    tmp = _SECTION_CACHE_PATH + ".tmp"
+    try:
+        os.makedirs(os.path.dirname(_SECTION_CACHE_PATH), exist_ok=True)
+        with open(tmp, "w") as f:
+            json.dump(cache, f)
+        os.replace(tmp, _SECTION_CACHE_PATH)
+    except OSError:
+        pass
 
 
 def find_section_path_from_transcript(transcript_path: str) -> str | None:
     """Extract the section output path from the agent transcript.
 
-    Looks for Write tool calls in the transcript to find the section file path.
+    Looks for Write tool calls in the transcript to find the section
+    file path. The qualifying Write is almost always among the final
+    turns, so lines are scanned from EOF backward over an mmap and the
+    first hit — i.e. the most recent section Write — wins, typically
+    after touching only the last page or two of a long transcript.
     """
-    try:
-        with open(transcript_path) as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    entry = json.loads(line)
-                except json.JSONDecodeError:
-                    continue
+    cache = _load_scan_cache()
+    cached = cache.get(transcript_path)
+    cached_size, cached_path = cached if isinstance(cached, list) and len(cached) == 2 else (0, None)
 
-                # Look for Write tool results or tool_use with file_path
-                content = entry.get("content", "")
-                if isinstance(content, list):
-                    for block in content:
-                        if isinstance(block, dict):
-                            # Look for tool_use with Write
-                            if block.get("type") == "tool_use" and block.get("name") == "Write":
-                                inp = block.get("input", {})
-                                file_path = inp.get("file_path", "")
-                                if "section-" in file_path and file_path.endswith(".md"):
-                                    return file_path
-    except (OSError, json.JSONDecodeError):
+    try:
+        st_size = os.stat(transcript_path).st_size
+        if cached_path and st_size == cached_size and os.path.exists(cached_path):
+            # Nothing appended since the last scan — reuse its answer
+            return cached_path
+        if st_size < cached_size:
+            # The transcript shrank: a truncated or rotated file reusing
+            # the path. The cached scan covered bytes that no longer
+            # exist, so start cold
+            cached_size, cached_path = 0, None
+
+        with open(transcript_path, "rb") as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty transcript
+                return None
+            with mm:
+                is_section_path = SECTION_MD_RE.search
+                # Bytes below the cached size were covered by the scan
+                # that produced cached_path, so only walk the suffix
+                scan_floor = cached_size if cached_path else 0
+                found = None
+                end = len(mm)
+                while end > scan_floor and found is None:
+                    start = mm.rfind(b"\n", 0, end)
+                    line = mm[start + 1:end]
+                    end = start
+                    # Cheap byte prefilter: a qualifying entry must mention
+                    # the Write tool and a section-*.md path, so skip the
+                    # tokenizer for the vast majority of transcript lines
+                    if b'"Write"' not in line or b"section-" not in line or b".md" not in line:
+                        continue
+                    try:
+                        entry = _jloads(line)
+                    except ValueError:
+                        continue
+                    # Valid JSON that isn't an object (the prefilter only
+                    # checks bytes) must not crash the entry probe below
+                    if not isinstance(entry, dict):
+                        continue
+
+                    # Look for a tool_use block invoking Write. Blocks
+                    # are dicts in any well-formed transcript, so .get
+                    # is tried directly and the rare non-dict element
+                    # surfaces as AttributeError instead of paying an
+                    # isinstance check on every block
+                    content = entry.get("content", "")
+                    if isinstance(content, list):
+                        for block in content:
+                            try:
+                                if block.get("type") == "tool_use" and block.get("name") == "Write":
+                                    file_path = block.get("input", {}).get("file_path", "")
+                                    if is_section_path(file_path):
+                                        found = file_path
+                                        break
+                            except (AttributeError, TypeError):
+                                continue
+
+        # No qualifying Write in the new suffix: the previous scan's
+        # result still stands for the shared prefix
+        if found is None:
+            found = cached_path
+        if found:
+            # Re-insert at the end so cap eviction drops the stalest
+            # transcript first
+            cache.pop(transcript_path, None)
+            cache[transcript_path] = [st_size, found]
+            _save_scan_cache(cache)
+        return found
+    except OSError:
         pass
     return None
 
 
-def validate_section_file(path: str) -> list[str]:
+def validate_section_file(path: str, st: os.stat_result) -> list[str]:
     """Validate a section file has required structure.
 
+    Takes the caller's stat result so the existence check, the size
+    check, and the read share one stat(2) between them.
     Returns list of issues (empty = valid).
     """
     issues = []
+
+    # A legitimate section plan is a few KB; anything in the megabytes
+    # is a runaway writer, not a section — flag it without reading it
+    if st.st_size > _MAX_SECTION_BYTES:
+        return [f"File implausibly large ({st.st_size} bytes), skipping validation"]
+
+    # Frontmatter and the required headings all live in the prologue, so
+    # a capped read is enough even for oversized-but-sane files
     try:
-        content = Path(path).read_text()
+        with open(path, "rb") as f:
+            content = f.read(min(st.st_size, _VALIDATION_READ_CAP))
     except OSError as e:
         return [f"Cannot read file: {e}"]
 
     if len(content.strip()) < 100:
-        issues.append(f"File suspiciously short ({len(content)} bytes)")
+        issues.append(f"File suspiciously short ({st.st_size} bytes)")
 
     # Check for YAML frontmatter
-    if not content.startswith("---"):
+    if not content.startswith(b"---"):
         issues.append("Missing YAML frontmatter")
 
-    # Check for required sections
-    required_sections = [
-        "## Context",
-        "## What to Build",
-        "## Tests to Write First",
-        "## Acceptance Criteria",
-    ]
-    for section in required_sections:
-        if section not in content:
-            issues.append(f"Missing required section: {section}")
-
-    # Check for behavior IDs in acceptance criteria
-    if "- [ ]" not in content:
+    # Check required sections and the acceptance-criteria checkboxes in
+    # one scan of the content
+    found = _find_needles(content)
+    issues.extend(
+        f"Missing required section: {s.decode()}"
+        for s in REQUIRED_SECTIONS
+        if s not in found
+    )
+
+    if _CHECKBOX_MARKER not in found:
         issues.append("No checkbox items in Acceptance Criteria")
 
     return issues
@@ -146,13 +417,13 @@ def main() -> int:
     """
     debug_log("=== VERIFY SECTION HOOK STARTED ===")
 
-    # 1. Parse stdin payload
+    # 1. Parse stdin payload straight off the fd — no intermediate
+    # full-buffer string
     try:
-        raw_input = sys.stdin.read()
-        payload = json.loads(raw_input) if raw_input else {}
-    except (json.JSONDecodeError, Exception):
-        debug_log("Failed to parse stdin")
-        return 0
+        payload = json.load(sys.stdin)
+    except (ValueError, OSError):
+        debug_log("Failed to parse stdin (empty or malformed)")
+        payload = {}
 
     # 2. Get transcript path
     transcript_path = payload.get("agent_transcript_path")
@@ -161,8 +432,21 @@ def main() -> int:
         debug_log("No transcript path")
         return 0
 
-    # 3. Wait for transcript to stabilize
-    if not wait_for_stable_file(transcript_path):
+    # 3. Wait for transcript to stabilize. Fast path first: on a normal
+    # SubagentStop the transcript was closed before the hook even
+    # started, so an mtime already older than the stability window means
+    # no waiting at all. Otherwise fall back to inotify, then polling.
+    stable = False
+    try:
+        st = os.stat(transcript_path)
+        stable = (time.time() - st.st_mtime) * 1000 >= _STABILITY_MS
+    except OSError:
+        pass
+    if not stable:
+        stable = _wait_inotify(transcript_path)
+        if stable is None:
+            stable = wait_for_stable_file(transcript_path)
+    if not stable:
         debug_log("Transcript file not stable")
         return 0
 
@@ -173,36 +457,26 @@ def main() -> int:
         debug_log("Could not find section path in transcript")
         return 0
 
-    # 5. Verify the file exists
-    if not Path(section_path).exists():
+    # 5. Verify the file exists — the stat doubles as the size source
+    # for validation
+    try:
+        section_stat = os.stat(section_path)
+    except OSError:
         debug_log(f"Section file MISSING: {section_path}")
         # Output warning for orchestrator
-        output = {
-            "hookSpecificOutput": {
-                "hookEventName": "SubagentStop",
-                "additionalContext": (
-                    f"[SECTION_VERIFICATION_FAILED] Section file not found: {section_path}. "
-                    "The plan-section-writer may have failed to write. Re-queue this section."
-                ),
-            }
-        }
-        print(json.dumps(output))
+        print(_OUTPUT_TMPL.format(ctx=json.dumps(
+            f"[SECTION_VERIFICATION_FAILED] Section file not found: {section_path}. "
+            "The plan-section-writer may have failed to write. Re-queue this section."
+        )))
         return 0
 
     # 6. Validate structure
-    issues = validate_section_file(section_path)
+    issues = validate_section_file(section_path, section_stat)
     if issues:
         debug_log(f"Validation issues: {issues}")
-        output = {
-            "hookSpecificOutput": {
-                "hookEventName": "SubagentStop",
-                "additionalContext": (
-                    f"[SECTION_VERIFICATION_WARNING] {section_path}: "
-                    + "; ".join(issues)
-                ),
-            }
-        }
-        print(json.dumps(output))
+        print(_OUTPUT_TMPL.format(ctx=json.dumps(
+            f"[SECTION_VERIFICATION_WARNING] {section_path}: " + "; ".join(issues)
+        )))
     else:
         debug_log(f"Section verified OK: {section_path}")
 